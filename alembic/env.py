@@ -9,6 +9,8 @@ from app.models.user import User
 from app.models.apikey import APIKey
 from app.models.message import Message, MessageSender
 from app.models.scrapedcontent import ScrapedContent
+from app.models.crawledpage import CrawledPage
+from app.models.scrapejob import ScrapeJob, ScrapeJobStatus
 from app.models.website import Website, ScrapingStatus
 from app.db.base import Base
 
@@ -0,0 +1,50 @@
+"""add scrape_jobs queue
+
+Revision ID: 5a1e7c2f9b04
+Revises: bf435d3e99fc
+Create Date: 2026-10-18 16:02:51.774120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1e7c2f9b04'
+down_revision: Union[str, None] = 'bf435d3e99fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'scrape_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('website_id', sa.Integer(), nullable=False),
+        sa.Column('incremental', sa.Boolean(), nullable=False),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='scrapejobstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_by', sa.String(length=255), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['website_id'], ['websites.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_scrape_jobs_id'), 'scrape_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_scrape_jobs_website_id'), 'scrape_jobs', ['website_id'], unique=False)
+    op.create_index('ix_scrape_jobs_status_run_after', 'scrape_jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scrape_jobs_status_run_after', table_name='scrape_jobs')
+    op.drop_index(op.f('ix_scrape_jobs_website_id'), table_name='scrape_jobs')
+    op.drop_index(op.f('ix_scrape_jobs_id'), table_name='scrape_jobs')
+    op.drop_table('scrape_jobs')
+    sa.Enum(name='scrapejobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,30 @@
+"""add rolling summary to chat_sessions
+
+Revision ID: 8c2d4f6a1e37
+Revises: 5a1e7c2f9b04
+Create Date: 2026-10-18 19:41:12.358204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2d4f6a1e37'
+down_revision: Union[str, None] = '5a1e7c2f9b04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_sessions', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('chat_sessions', sa.Column('summarized_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_sessions', 'summarized_until')
+    op.drop_column('chat_sessions', 'summary')
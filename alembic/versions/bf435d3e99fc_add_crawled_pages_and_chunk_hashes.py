@@ -0,0 +1,57 @@
+"""add crawled_pages and scraped_content content hashes
+
+Revision ID: bf435d3e99fc
+Revises: d0c6a079e22e
+Create Date: 2026-10-18 14:26:09.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bf435d3e99fc'
+down_revision: Union[str, None] = 'd0c6a079e22e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'crawled_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('website_id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(length=2048), nullable=False),
+        sa.Column('etag', sa.String(length=512), nullable=True),
+        sa.Column('last_modified', sa.String(length=128), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('links', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('last_crawled_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['website_id'], ['websites.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('website_id', 'url', name='uq_crawled_pages_website_url'),
+    )
+    op.create_index(op.f('ix_crawled_pages_id'), 'crawled_pages', ['id'], unique=False)
+    op.create_index(op.f('ix_crawled_pages_website_id'), 'crawled_pages', ['website_id'], unique=False)
+
+    # Existing chunks keep a NULL hash; the first incremental re-crawl of their page replaces them
+    op.add_column('scraped_content', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ix_scraped_content_website_source_url',
+        'scraped_content',
+        ['website_id', 'source_url'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scraped_content_website_source_url', table_name='scraped_content')
+    op.drop_column('scraped_content', 'content_hash')
+    op.drop_index(op.f('ix_crawled_pages_website_id'), table_name='crawled_pages')
+    op.drop_index(op.f('ix_crawled_pages_id'), table_name='crawled_pages')
+    op.drop_table('crawled_pages')
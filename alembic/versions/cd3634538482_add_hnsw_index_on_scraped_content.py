@@ -0,0 +1,39 @@
+"""add hnsw index on scraped_content embedding
+
+Revision ID: cd3634538482
+Revises: 6eb688b49412
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cd3634538482'
+down_revision: Union[str, None] = '6eb688b49412'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # HNSW index using the L2 operator class, matching the embedding.l2_distance()
+    # ordering used by CRUDScrapedContent.get_relevant_scraped_content.
+    # Requires pgvector >= 0.5.0.
+    op.create_index(
+        'ix_scraped_content_embedding_hnsw',
+        'scraped_content',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_l2_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scraped_content_embedding_hnsw', table_name='scraped_content')
@@ -0,0 +1,28 @@
+"""add last_scraped_at to websites
+
+Revision ID: d0c6a079e22e
+Revises: cd3634538482
+Create Date: 2026-10-18 11:03:47.916520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0c6a079e22e'
+down_revision: Union[str, None] = 'cd3634538482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('websites', sa.Column('last_scraped_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('websites', 'last_scraped_at')
@@ -3,12 +3,14 @@ from jwt import PyJWTError
 
 from app.crud.crud_apikey import crud_api_key
 from app.crud.crud_user import crud_user
+from app.crud.crud_website import crud_website
 from app.models.website import Website
 from fastapi import Security, HTTPException, status, Depends, Request
 from fastapi.security.api_key import APIKeyHeader
 from app.models.user import User
 from app.core.config import get_settings
-from app.core.security import verify_key
+from app.core.security import verify_key, fingerprint_key
+from app.core.api_key_cache import verified_key_cache, VerifiedKey
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -113,16 +115,38 @@ async def get_chatauth_from_api_key(
 ) -> tuple[User, Website]:
     """
     Dependency that authenticates a user AND identifies the associated website.
+    Keys verified recently are served from the verified-key cache without the
+    find_by_prefix query or bcrypt. The user and website themselves are loaded
+    on every request, so the website's scraping status and last_scraped_at,
+    which version the retrieval and answer caches, are never stale.
     """
     if not api_key:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="API key is missing")
 
+    fingerprint = fingerprint_key(api_key)
+    cached_key = verified_key_cache.get(fingerprint)
+    if cached_key is not None:
+        if not cached_key.is_active:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or inactive API key")
+        user = await crud_user.get(db, id=cached_key.user_id)
+        website = await crud_website.get(db, id=cached_key.website_id)
+        if user is None or website is None:
+            verified_key_cache.invalidate_key(cached_key.key_id)
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or inactive API key")
+        return (user, website)
+
     prefix = api_key[:8]
     potential_key = await crud_api_key.find_by_prefix(db,prefix=prefix)
 
     if not potential_key or not potential_key.is_active or not verify_key(api_key, potential_key.hashed_key):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or inactive API key")
 
+    verified_key_cache.put(fingerprint, VerifiedKey(
+        key_id=potential_key.id,
+        user_id=potential_key.user_id,
+        website_id=potential_key.website_id,
+        is_active=potential_key.is_active,
+    ))
     return (potential_key.user, potential_key.website)
 
 async def redirect_if_authenticated(
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.chatbot import ChatRequest, ChatResponse
 from app.api.deps import get_db, get_chatauth_from_api_key
 
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
 from app.services.chat import ChatService
@@ -24,10 +24,35 @@ async def dash(
 @chatbot_router.post("/", response_model=ChatResponse)
 async def chat_with_website(
         chat_request: ChatRequest,
+        response: Response,
         auth_data: tuple = Depends(get_chatauth_from_api_key),
         chat_service: ChatService = Depends()
 ):
-    return await chat_service.process_chat_request(
+    chat_response = await chat_service.process_chat_request(
         chat_request=chat_request,
         auth_data=auth_data
-    )
\ No newline at end of file
+    )
+    response.headers.update(chat_service.timing_headers())
+    return chat_response
+
+
+@chatbot_router.post("/stream")
+async def stream_chat_with_website(
+        chat_request: ChatRequest,
+        auth_data: tuple = Depends(get_chatauth_from_api_key),
+        chat_service: ChatService = Depends()
+):
+    """
+    Same as POST /chat/ but sends the answer as Server-Sent Events while it is generated:
+    one 'session' event, then 'token' events, then a final 'done' event.
+    """
+    events = await chat_service.stream_chat_request(
+        chat_request=chat_request,
+        auth_data=auth_data
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream; timings cover the stages before the first token
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **chat_service.timing_headers()}
+    )
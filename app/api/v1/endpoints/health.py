@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.services.clients import ServiceClients, cache_stats, get_clients
+
+health_router = APIRouter(prefix="/health")
+
+
+@health_router.get("/live")
+async def liveness():
+    """The process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@health_router.get("/ready")
+async def readiness(clients: ServiceClients = Depends(get_clients)):
+    """
+    503 until the worker's clients are warmed up, so a load balancer only
+    routes chats to workers that won't pay the cold-start cost. Also reports
+    this worker's cache hit rates.
+    """
+    status = "ready" if clients.ready else "warming_up"
+    return JSONResponse(
+        status_code=200 if clients.ready else 503,
+        content={"status": status, "warmup": clients.warmup, "caches": cache_stats(clients)},
+    )
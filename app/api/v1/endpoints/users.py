@@ -2,7 +2,7 @@ import uuid
 
 from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
 from app.crud.crud_user import crud_user
@@ -13,6 +13,7 @@ from app.schemas.website import WebsiteCreate, WebsiteURLRequest
 from app.api.deps import get_db, get_current_user, redirect_if_authenticated
 from app.services.authentication import AuthenticationService
 from app.services.dashboard import DashboardService
+from app.services.scrape_progress import stream_scrape_events
 
 # Initialize Jinja2 templates to render HTML pages
 templates = Jinja2Templates(directory="templates")
@@ -101,6 +102,19 @@ async def delete_api_key(
 
     return Response(status_code=204)
 
+
+@user_router.post("/websites/{website_id}/refresh", status_code=202)
+async def refresh_website(
+        website_id: int,
+        current_user: User = Depends(get_current_user),
+        dashboard_service: DashboardService = Depends()
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    await dashboard_service.refresh_website(website_id=website_id, current_user=current_user)
+
+    return {"message": "Refresh has started."}
+
 # --- Dashboard and SSE Endpoints ---
 
 @user_router.get("/dashboard", response_class=HTMLResponse)
@@ -108,4 +122,22 @@ async def dash(
         request: Request,
         current_user: User = Depends(get_current_user)
 ):
-    return templates.TemplateResponse("dashboard.html",{"request": request, "user": current_user})
\ No newline at end of file
+    return templates.TemplateResponse("dashboard.html",{"request": request, "user": current_user})
+
+
+@user_router.get("/dashboard/events")
+async def dashboard_events(current_user: User = Depends(get_current_user)):
+    """
+    Streams scraping status and progress of the user's websites as Server-Sent Events.
+    The user is loaded once per connection instead of on every status check.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    website_ids = {key.website_id for key in current_user.api_keys}
+    return StreamingResponse(
+        stream_scrape_events(website_ids),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,55 @@
+import uuid
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+
+from app.core.config import get_settings
+
+
+@dataclass(frozen=True)
+class VerifiedKey:
+    """Result of a successful bcrypt verification of an API key."""
+    key_id: uuid.UUID
+    user_id: uuid.UUID
+    website_id: int
+    is_active: bool
+
+
+class VerifiedKeyCache:
+    """
+    Short-lived, per-worker cache of verified API keys, keyed by fingerprint_key(api_key).
+
+    A hit skips both the find_by_prefix query and the bcrypt verify on the chat
+    hot path. Only keys that passed verification are stored, and only their ids:
+    the user and website are still loaded by primary key on every request.
+    Entries are removed explicitly when a key or its website is deleted; the TTL
+    bounds how long other workers can lag behind.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+
+    def get(self, fingerprint: str) -> VerifiedKey | None:
+        return self._cache.get(fingerprint)
+
+    def put(self, fingerprint: str, verified_key: VerifiedKey):
+        self._cache[fingerprint] = verified_key
+
+    def invalidate_key(self, key_id: uuid.UUID):
+        for fingerprint, verified_key in list(self._cache.items()):
+            if verified_key.key_id == key_id:
+                self._cache.pop(fingerprint, None)
+
+    def invalidate_website(self, website_id: int):
+        for fingerprint, verified_key in list(self._cache.items()):
+            if verified_key.website_id == website_id:
+                self._cache.pop(fingerprint, None)
+
+
+settings = get_settings()
+
+# Create a single instance to be used throughout the worker
+verified_key_cache = VerifiedKeyCache(
+    maxsize=settings.API_KEY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.API_KEY_CACHE_TTL_SECONDS,
+)
@@ -8,6 +8,145 @@ class Settings(BaseSettings):
     DB_PASSWORD:str
     SECRET_KEY: str
     GOOGLE_API_KEY: str
+
+    # Log every SQL statement sent by the async and sync engines (very noisy while scraping)
+    DB_ECHO: bool = False
+
+    # Verified API keys are cached per worker to keep bcrypt off the chat hot path.
+    # The TTL bounds how long a change made by another worker can go unnoticed.
+    API_KEY_CACHE_TTL_SECONDS: float = 60.0
+    API_KEY_CACHE_MAX_ENTRIES: int = 10000
+
+    # Crawl page budget per website
+    SCRAPER_MAX_PAGES: int = 10
+    # Number of pages rendered in parallel by the crawler
+    SCRAPER_CONCURRENCY: int = 4
+    # Minimum spacing between requests to the same domain
+    SCRAPER_POLITENESS_DELAY_SECONDS: float = 0.5
+    SCRAPER_PAGE_TIMEOUT_MS: int = 30000
+    # Playwright navigation wait condition: 'load', 'domcontentloaded' or 'networkidle'
+    SCRAPER_WAIT_UNTIL: str = "load"
+    # Documents (HTML, PDF, Word) larger than this are skipped
+    SCRAPER_MAX_DOCUMENT_BYTES: int = 25 * 1024 * 1024
+    # Crawl order: 'sitemap_first', 'shallow_first' or 'fifo'
+    SCRAPER_FRONTIER_STRATEGY: str = "sitemap_first"
+    # Maximum link depth from the start URL; None means unlimited
+    SCRAPER_MAX_DEPTH: int | None = None
+    # Keep non-tracking query parameters when normalizing URLs (dropped entirely by default)
+    SCRAPER_KEEP_QUERY_PARAMS: bool = False
+    # Honour robots.txt disallow rules and crawl-delay
+    SCRAPER_RESPECT_ROBOTS: bool = True
+    # Seed the crawl from sitemap.xml (as listed in robots.txt, or at the site root)
+    SCRAPER_USE_SITEMAPS: bool = True
+    # Upper bound on URLs read from a site's sitemaps
+    SCRAPER_SITEMAP_MAX_URLS: int = 50000
+    # A robots.txt crawl-delay above this is capped, so one site can't stall a scrape
+    SCRAPER_MAX_CRAWL_DELAY_SECONDS: float = 10.0
+
+    # Websites crawled at the same time by one scraper worker process (python -m app.workers.scraper)
+    SCRAPE_WORKER_CONCURRENCY: int = 2
+    # How often an idle worker checks the scrape_jobs table for new work
+    SCRAPE_JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    # Attempts per job; failed attempts are retried after RETRY_BACKOFF * 2^(attempt - 1) seconds
+    SCRAPE_JOB_MAX_ATTEMPTS: int = 3
+    SCRAPE_JOB_RETRY_BACKOFF_SECONDS: float = 60.0
+    # Running jobs report in this often; a job silent for STALE_AFTER is assumed lost with its worker
+    SCRAPE_JOB_HEARTBEAT_SECONDS: float = 30.0
+    SCRAPE_JOB_STALE_AFTER_SECONDS: float = 300.0
+    # Shortest interval between progress events a crawl publishes to the dashboard
+    SCRAPE_PROGRESS_INTERVAL_SECONDS: float = 1.0
+    # Idle dashboard event streams send a comment this often so proxies keep them open
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+
+    # Token budget per chunk, counted with the embedding model's tokenizer. all-MiniLM-L6-v2 reads
+    # 256 tokens including [CLS] and [SEP]; anything past that would be silently truncated
+    CHUNK_MAX_TOKENS: int = 254
+    # Trailing sentences repeated at the start of the next chunk of the same section
+    CHUNK_OVERLAP_TOKENS: int = 32
+    # Sections shorter than this are merged into the following section instead of stored alone
+    CHUNK_MIN_TOKENS: int = 48
+
+    # Number of chunks encoded per SentenceTransformer call during scraping
+    EMBEDDING_BATCH_SIZE: int = 64
+    # Threads running query embeddings for chat requests
+    EMBEDDING_QUERY_WORKERS: int = 2
+    # Concurrent chat queries arriving within this window are encoded together
+    EMBEDDING_QUERY_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_QUERY_MAX_BATCH: int = 32
+    # Memory cap (bytes) and lifetime of the chat query-embedding cache; 0 disables it
+    EMBEDDING_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    EMBEDDING_CACHE_TTL_SECONDS: float = 3600.0
+    # Chunks the scraper buffers before embedding them, writing them and committing, all in one go
+    INGESTION_WRITE_BATCH_SIZE: int = 512
+    # Write chunks with a binary COPY (psycopg2 only); False falls back to an executemany INSERT
+    INGESTION_USE_COPY: bool = True
+
+    # Skip chunks whose text (and image) already exists for the website, e.g. shared footers
+    DEDUP_EXACT_ENABLED: bool = True
+    # Also skip chunks whose SimHash is within DEDUP_SIMHASH_MAX_DISTANCE bits of one stored in the same crawl
+    DEDUP_NEAR_DUPLICATES_ENABLED: bool = False
+    DEDUP_SIMHASH_MAX_DISTANCE: int = 6
+
+    # HNSW search-time candidate list size (pgvector's hnsw.ef_search).
+    # Higher values trade latency for recall; must be >= the requested top_k.
+    HNSW_EF_SEARCH: int = 40
+    # pgvector >= 0.8 only: 'relaxed_order' or 'strict_order' keeps scanning the index
+    # until enough rows survive the website_id filter. With 'off', a website holding a
+    # small share of scraped_content gets fewer than top_k chunks; only use it on older versions.
+    HNSW_ITERATIVE_SCAN: str = "relaxed_order"
+
+    # Where chat retrieval runs: 'pgvector' (database) or 'memory' (per-website NumPy matrices)
+    RETRIEVAL_BACKEND: str = "pgvector"
+    # Number of website matrices kept in memory per worker by the 'memory' backend
+    RETRIEVAL_MEMORY_MAX_WEBSITES: int = 256
+
+    LLM_MODEL_NAME: str = "gemini-1.5-flash-latest"
+    # Maximum number of Gemini calls in flight per worker; extra calls wait for a free slot
+    LLM_MAX_CONCURRENCY: int = 32
+    # Upper bound for a single Gemini call (for streams: starting it, and each wait for the next chunk)
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    # Send one tiny Gemini request while an API worker starts, so the first chat doesn't open the connection
+    LLM_WARMUP_ENABLED: bool = True
+
+    # Chat history sent to the LLM: the last N question/answer turns, within a token budget
+    CHAT_HISTORY_WINDOW_TURNS: int = 6
+    CHAT_HISTORY_MAX_TOKENS: int = 1500
+    # Turns older than the window are folded into a rolling per-session LLM summary, updated in the background
+    CHAT_SUMMARY_ENABLED: bool = True
+    CHAT_SUMMARY_MAX_TOKENS: int = 300
+    # Messages folded into the summary per background update
+    CHAT_SUMMARY_BATCH_MESSAGES: int = 40
+    # Search with the raw question while the LLM rewrites it, then fuse both result lists
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = True
+    # Report per-stage chat latencies (history, rewrite, embed, search, llm) in a Server-Timing header
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Images of image chunks sent to the LLM: downscaled, re-encoded and stored on disk by content hash.
+    # The scraper prefetches them, so chat turns don't download from the website
+    IMAGE_CACHE_DIR: str = "image_cache"
+    IMAGE_PREFETCH_ENABLED: bool = True
+    IMAGE_MAX_DIMENSION: int = 768
+    # 'WEBP' or 'JPEG'
+    IMAGE_CACHE_FORMAT: str = "WEBP"
+    IMAGE_CACHE_QUALITY: int = 80
+    # Decoded images kept in memory per worker
+    IMAGE_CACHE_MEMORY_ITEMS: int = 256
+    # Stored images older than this are downloaded again by the next scrape
+    IMAGE_CACHE_MAX_AGE_SECONDS: float = 7 * 24 * 3600
+    IMAGE_FETCH_WORKERS: int = 8
+    IMAGE_FETCH_TIMEOUT_SECONDS: float = 10.0
+    IMAGE_FETCH_MAX_BYTES: int = 10 * 1024 * 1024
+    # An image that failed to load is not retried for this long
+    IMAGE_FETCH_FAILURE_TTL_SECONDS: float = 300.0
+
+    # Semantic answer cache for first-turn questions (opt-in)
+    ANSWER_CACHE_ENABLED: bool = False
+    # Minimum cosine similarity between two questions for a cached answer to be reused
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES_PER_WEBSITE: int = 500
+    ANSWER_CACHE_TTL_SECONDS: float = 24 * 3600
+    ANSWER_CACHE_MAX_WEBSITES: int = 1000
+
     model_config = SettingsConfigDict(env_file=find_dotenv() , extra='ignore')
 
 @lru_cache
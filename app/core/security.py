@@ -3,6 +3,8 @@ import bcrypt
 bcrypt.__about__ = bcrypt
 #####
 
+import hashlib
+import hmac
 import jwt
 from passlib.context import CryptContext
 from datetime import datetime,timedelta
@@ -34,4 +36,11 @@ def hash_key(key: str) -> str:
     return api_key_context.hash(key)
 
 def verify_key(key: str, hashed_key: str) -> bool:
-    return api_key_context.verify(key, hashed_key)
\ No newline at end of file
+    return api_key_context.verify(key, hashed_key)
+
+def fingerprint_key(key: str) -> str:
+    """
+    Fast keyed hash (HMAC-SHA256 with the app secret) of a presented API key.
+    Used as the lookup key of the verified-key cache, so raw keys are never kept in memory.
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), key.encode(), hashlib.sha256).hexdigest()
\ No newline at end of file
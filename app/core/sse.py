@@ -0,0 +1,6 @@
+import json
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Formats one Server-Sent Event. The payload is JSON so newlines in tokens stay inside one data line."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
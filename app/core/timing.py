@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the named stages of one request, reported in a
+    Server-Timing header so they show up in the browser's network panel.
+    Stages may overlap; each is timed on its own.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items())
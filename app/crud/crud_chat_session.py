@@ -1,3 +1,7 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base_crud import CRUDBase
 from app.models.chat_session import Chat_session
 from pydantic import BaseModel
@@ -5,6 +9,16 @@ from app.schemas.chat_session import ChatSessionCreate
 
 
 class CRUDChatSession(CRUDBase[Chat_session,ChatSessionCreate,BaseModel]):
-    pass
 
-crud_chat_session = CRUDChatSession(Chat_session)
\ No newline at end of file
+    async def update_summary(self, db: AsyncSession, session_id: uuid.UUID, summary: str,
+                             summarized_until: datetime):
+        """Stores a session's rolling summary without loading the session first."""
+        statement = (
+            update(self.model)
+            .where(self.model.id == session_id)
+            .values(summary=summary, summarized_until=summarized_until)
+        )
+        await db.execute(statement)
+        await db.commit()
+
+crud_chat_session = CRUDChatSession(Chat_session)
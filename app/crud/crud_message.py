@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from typing import List
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,12 +12,36 @@ from app.schemas.message import MessageCreate
 
 class CRUDMessage(CRUDBase[Message, MessageCreate, BaseModel]):
 
-    async def get_messages_by_session(self, db: AsyncSession, session_id: uuid.UUID) -> List[Message]:
+    async def get_recent_messages(self, db: AsyncSession, session_id: uuid.UUID, limit: int,
+                                  before: datetime | None = None) -> List[Message]:
+        """
+        The newest `limit` messages of a session (sent before `before`, if given), newest first.
+        Served by the messages_time_created_desc index, so only those rows are read.
+        """
         statement = (
             select(self.model)
             .where(self.model.chat_session_id == session_id)
             .order_by(self.model.time_created.desc())
+            .limit(limit)
         )
+        if before is not None:
+            statement = statement.where(self.model.time_created < before)
+
+        result = await db.execute(statement)
+
+        return result.scalars().all()
+
+    async def get_messages_between(self, db: AsyncSession, session_id: uuid.UUID, after: datetime | None,
+                                   before: datetime, limit: int) -> List[Message]:
+        """Up to `limit` of the oldest messages sent after `after` and before `before`, oldest first."""
+        statement = (
+            select(self.model)
+            .where(self.model.chat_session_id == session_id, self.model.time_created < before)
+            .order_by(self.model.time_created.asc())
+            .limit(limit)
+        )
+        if after is not None:
+            statement = statement.where(self.model.time_created > after)
 
         result = await db.execute(statement)
 
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base_crud import CRUDBase
+from app.models.scrapejob import ScrapeJob, ScrapeJobStatus
+
+ACTIVE_STATUSES = (ScrapeJobStatus.QUEUED, ScrapeJobStatus.RUNNING)
+
+
+class CRUDScrapeJob(CRUDBase[ScrapeJob, BaseModel, BaseModel]):
+
+    async def enqueue(self, db: AsyncSession, website_id: int, incremental: bool = False) -> ScrapeJob:
+        """Adds a job to the queue; a scraper worker picks it up within its poll interval."""
+        job = self.model(website_id=website_id, incremental=incremental, status=ScrapeJobStatus.QUEUED)
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    async def get_active_for_website(self, db: AsyncSession, website_id: int) -> ScrapeJob | None:
+        """The queued or running job of a website, if there is one."""
+        statement = (
+            select(self.model)
+            .where(self.model.website_id == website_id, self.model.status.in_(ACTIVE_STATUSES))
+            .limit(1)
+        )
+        result = await db.execute(statement)
+        return result.scalar_one_or_none()
+
+
+crud_scrape_job = CRUDScrapeJob(ScrapeJob)
@@ -1,8 +1,9 @@
 from typing import List
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
+from app.core.config import get_settings
 from app.crud.base_crud import CRUDBase
 from app.models.scrapedcontent import ScrapedContent
 from app.schemas.scrapedcontent import ScrapedContentCreate
@@ -11,6 +12,17 @@ from pgvector.sqlalchemy import Vector
 
 class CRUDScrapedContent(CRUDBase[ScrapedContent, ScrapedContentCreate, BaseModel]):
 
+    async def _set_search_params(self, db: AsyncSession, top_k: int):
+        """
+        Tunes the HNSW index scan for the current transaction only.
+        SET LOCAL doesn't accept bind parameters, so values are cast before formatting.
+        """
+        settings = get_settings()
+        ef_search = max(int(settings.HNSW_EF_SEARCH), top_k)
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+        if settings.HNSW_ITERATIVE_SCAN in ("relaxed_order", "strict_order"):
+            await db.execute(text(f"SET LOCAL hnsw.iterative_scan = {settings.HNSW_ITERATIVE_SCAN}"))
+
     async def get_relevant_scraped_content(
         self, db: AsyncSession, website_id: int, embedding: List[float], top_k: int
     ) -> List[ScrapedContent]:
@@ -18,16 +30,35 @@ class CRUDScrapedContent(CRUDBase[ScrapedContent, ScrapedContentCreate, BaseMode
         Finds the most relevant text chunks from the database
         using vector similarity search (L2 distance).
         """
+        await self._set_search_params(db, top_k)
+
+        distance = self.model.embedding.l2_distance(embedding).label("distance")
         statement = (
-            select(self.model)
+            select(self.model, distance)
             .filter(self.model.website_id == website_id)
-            .order_by(self.model.embedding.l2_distance(embedding))
+            .order_by(distance)
             .limit(top_k)
         )
 
         result = await db.execute(statement)
 
+        # A relaxed_order iterative scan can return rows slightly out of order
+        return [row[0] for row in sorted(result.all(), key=lambda row: row.distance)]
+
+    async def get_embedded_by_website(self, db: AsyncSession, website_id: int) -> List[ScrapedContent]:
+        """
+        Loads every chunk of a website that has an embedding.
+        Used to build the in-memory search matrix for a website.
+        """
+        statement = (
+            select(self.model)
+            .filter(self.model.website_id == website_id, self.model.embedding.is_not(None))
+            .order_by(self.model.id)
+        )
+
+        result = await db.execute(statement)
+
         return result.scalars().all()
 
 
-crud_scraped_content = CRUDScrapedContent(ScrapedContent)
\ No newline at end of file
+crud_scraped_content = CRUDScrapedContent(ScrapedContent)
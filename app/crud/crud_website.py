@@ -2,6 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base_crud import CRUDBase
+from app.models.scrapejob import ScrapeJob, ScrapeJobStatus
 from app.models.website import Website, ScrapingStatus
 from app.schemas.website import WebsiteCreate, WebsiteUpdate
 
@@ -13,4 +14,18 @@ class CRUDWebsite(CRUDBase[Website,WebsiteCreate,WebsiteUpdate]):
         result = await db.execute(statement)
         return result.scalar_one_or_none()
 
+    async def create_with_scrape_job(self, db: AsyncSession, *, obj_in: WebsiteCreate) -> Website:
+        """
+        Creates a website and queues its first scrape job in the same transaction,
+        so a website is never left PENDING without a job a worker will pick up.
+        """
+        website = await self.create_model(obj_in)
+        db.add(website)
+        # Assigns website.id without committing
+        await db.flush()
+        db.add(ScrapeJob(website_id=website.id, incremental=False, status=ScrapeJobStatus.QUEUED))
+        await db.commit()
+        await db.refresh(website)
+        return website
+
 crud_website = CRUDWebsite(Website)
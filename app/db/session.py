@@ -1,11 +1,14 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.core.config import get_settings
 from .base import DB_URL, SYNC_DATABASE_URL
 
+settings = get_settings()
+
 async_engine = create_async_engine(
     DB_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
     pool_size=10,
     max_overflow=20,
     pool_recycle=1800,
@@ -26,7 +29,7 @@ AsyncSessionLocal = async_sessionmaker(
 
 sync_engine = create_engine(
     SYNC_DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
     pool_size=5,
     max_overflow=5,
     pool_recycle=1800,
@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from starlette.staticfiles import StaticFiles
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
@@ -6,9 +9,29 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from app.api.v1.endpoints.users import user_router
 from app.api.v1.endpoints.chatbot import chatbot_router
+from app.api.v1.endpoints.health import health_router
+from app.services.clients import close_clients, create_clients, warm_up
 
 templates = Jinja2Templates(directory="templates")
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the worker's LLM, embedding and cache clients once, and warms them
+    up in the background; /health/ready reports 503 until that's done.
+    """
+    app.state.clients = create_clients()
+    warmup = asyncio.create_task(warm_up(app.state.clients))
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+        await close_clients(app.state.clients)
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 origins = [
@@ -28,6 +51,7 @@ app.add_middleware(
 
 app.include_router(user_router)
 app.include_router(chatbot_router)
+app.include_router(health_router)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
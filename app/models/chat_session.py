@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
@@ -11,6 +11,10 @@ class Chat_session(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     website_id = Column(Integer, ForeignKey("websites.id"), nullable=False, index=True)
+    # Rolling LLM summary of the messages older than the history window,
+    # covering every message up to and including summarized_until
+    summary = Column(Text, nullable=True)
+    summarized_until = Column(DateTime(timezone=True), nullable=True)
 
     messages = relationship("Message", back_populates='chat_session', cascade="all, delete-orphan")
     website = relationship("Website", back_populates='chat_sessions')
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, func
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.base import Base
+import app.models.website
+
+
+class CrawledPage(Base):
+    """
+    What the crawler last saw at one URL of a website. The HTTP validators make
+    the next crawl's request conditional, the content hash tells whether the
+    extracted text changed, and the links let a re-crawl continue past pages
+    that answered 304 Not Modified without rendering them.
+    """
+    __tablename__ = "crawled_pages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    website_id = Column(Integer, ForeignKey("websites.id"), nullable=False, index=True)
+    url = Column(String(2048), nullable=False)  # Normalized, see app.services.frontier.normalize_url
+    etag = Column(String(512), nullable=True)
+    last_modified = Column(String(128), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    links = Column(JSONB, nullable=False, default=list)
+    last_crawled_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    website = relationship("Website", back_populates="crawled_pages")
+
+    __table_args__ = (
+        UniqueConstraint('website_id', 'url', name='uq_crawled_pages_website_url'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Index
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -14,5 +14,21 @@ class ScrapedContent(Base):
     source_url = Column(String(2048))
     image_url = Column(String(2048), nullable=True)
     embedding = Column(Vector(384), nullable=True)
+    # SHA-256 of text_content and image_url; lets a re-crawl keep unchanged chunks
+    content_hash = Column(String(64), nullable=True)
 
-    website = relationship("Website", back_populates="scraped_content")
\ No newline at end of file
+    website = relationship("Website", back_populates="scraped_content")
+
+    # Approximate nearest-neighbour index for the L2 distance search.
+    # Query-time recall is tuned with HNSW_EF_SEARCH in the settings.
+    __table_args__ = (
+        Index(
+            'ix_scraped_content_embedding_hnsw',
+            embedding,
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_l2_ops'},
+        ),
+        # Incremental re-crawls look up and replace the chunks of one page at a time
+        Index('ix_scraped_content_website_source_url', website_id, source_url),
+    )
\ No newline at end of file
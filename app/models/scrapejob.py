@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, Boolean, Text, Index, func
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+import enum
+import app.models.website
+
+
+class ScrapeJobStatus(enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class ScrapeJob(Base):
+    """
+    One scrape of a website, waiting for or claimed by a scraper worker.
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED and keep
+    heartbeat_at fresh while they run, so the jobs of a crashed worker can be
+    recognised and put back in the queue.
+    """
+    __tablename__ = "scrape_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    website_id = Column(Integer, ForeignKey("websites.id"), nullable=False, index=True)
+    incremental = Column(Boolean, nullable=False, default=False)
+    status = Column(Enum(ScrapeJobStatus), nullable=False, default=ScrapeJobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Not claimed before this time; pushed back after a failed attempt
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String(255), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    website = relationship("Website", back_populates="scrape_jobs")
+
+    # Serves the claim query: the next due job among the queued ones
+    __table_args__ = (
+        Index('ix_scrape_jobs_status_run_after', status, run_after),
+    )
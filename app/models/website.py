@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
@@ -7,6 +7,8 @@ import app.models.user
 import app.models.chat_session
 import app.models.scrapedcontent
 import app.models.apikey
+import app.models.crawledpage
+import app.models.scrapejob
 
 class ScrapingStatus(enum.Enum):
     PENDING = "PENDING"
@@ -20,9 +22,13 @@ class Website(Base):
     url = Column(String(2048), nullable=False, unique=True)
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     scraping_status = Column(Enum(ScrapingStatus), nullable=False, default=ScrapingStatus.PENDING)
+    # Set when a scrape finishes; used as a content version by in-process caches
+    last_scraped_at = Column(DateTime(timezone=True), nullable=True)
 
     owner = relationship("User", back_populates= "websites")
     chat_sessions = relationship("Chat_session", back_populates='website', cascade="all, delete-orphan")
     scraped_content = relationship("ScrapedContent", back_populates="website", cascade="all, delete-orphan")
     api_keys = relationship("APIKey", back_populates="website", cascade="all, delete-orphan")
+    crawled_pages = relationship("CrawledPage", back_populates="website", cascade="all, delete-orphan")
+    scrape_jobs = relationship("ScrapeJob", back_populates="website", cascade="all, delete-orphan")
 
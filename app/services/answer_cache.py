@@ -0,0 +1,130 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from cachetools import LRUCache
+
+from app.core.config import get_settings
+from app.models.website import ScrapingStatus, Website
+
+
+@dataclass
+class WebsiteAnswers:
+    """Recent first-turn answers of one website, with their query embeddings as one normalized matrix."""
+    version: datetime | None
+    entries: deque = field(default_factory=deque)  # (created_at, vector, answer)
+    matrix: np.ndarray | None = None
+
+
+class SemanticAnswerCache:
+    """
+    Opt-in per-website cache of (query embedding, answer) pairs.
+
+    A new question reuses a stored answer when the cosine similarity of the
+    two query embeddings passes the threshold. It is only consulted for the
+    first turn of a conversation, where the answer doesn't depend on history.
+    Like the in-memory retrieval backend, entries are tagged with the website's
+    last_scraped_at, so a re-scrape drops every answer built on old content.
+    """
+
+    def __init__(self, threshold: float, max_entries_per_website: int, ttl_seconds: float, max_websites: int):
+        self.threshold = threshold
+        self.max_entries_per_website = max_entries_per_website
+        self.ttl_seconds = ttl_seconds
+        self._websites: LRUCache = LRUCache(maxsize=max_websites)
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, website_id: int):
+        self._websites.pop(website_id, None)
+
+    def lookup(self, website: Website, embedding: List[float]) -> str | None:
+        answers = self._get_current(website)
+        if answers is None or not answers.entries:
+            self.misses += 1
+            return None
+
+        self._expire(answers)
+        if answers.matrix is None or not len(answers.entries):
+            self.misses += 1
+            return None
+
+        scores = answers.matrix @ _normalize(embedding)
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            self.hits += 1
+            return answers.entries[best][2]
+        self.misses += 1
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "websites": len(self._websites),
+            "entries": sum(len(answers.entries) for answers in self._websites.values()),
+        }
+
+    def store(self, website: Website, embedding: List[float], answer: str):
+        # Content is still changing while a scrape runs, so nothing is cached then
+        if website.scraping_status != ScrapingStatus.COMPLETED:
+            return
+
+        answers = self._get_current(website)
+        if answers is None:
+            answers = WebsiteAnswers(version=website.last_scraped_at)
+            self._websites[website.id] = answers
+
+        answers.entries.append((time.monotonic(), _normalize(embedding), answer))
+        while len(answers.entries) > self.max_entries_per_website:
+            answers.entries.popleft()
+        self._rebuild(answers)
+
+    def _get_current(self, website: Website) -> WebsiteAnswers | None:
+        answers = self._websites.get(website.id)
+        if answers is not None and (
+                website.scraping_status != ScrapingStatus.COMPLETED
+                or answers.version != website.last_scraped_at):
+            self.invalidate(website.id)
+            return None
+        return answers
+
+    def _expire(self, answers: WebsiteAnswers):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = False
+        while answers.entries and answers.entries[0][0] < cutoff:
+            answers.entries.popleft()
+            expired = True
+        if expired:
+            self._rebuild(answers)
+
+    @staticmethod
+    def _rebuild(answers: WebsiteAnswers):
+        if answers.entries:
+            answers.matrix = np.vstack([vector for _, vector, _ in answers.entries])
+        else:
+            answers.matrix = None
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@lru_cache
+def get_answer_cache() -> SemanticAnswerCache | None:
+    """Returns the process-wide answer cache, or None when ANSWER_CACHE_ENABLED is off."""
+    settings = get_settings()
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    return SemanticAnswerCache(
+        threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        max_entries_per_website=settings.ANSWER_CACHE_MAX_ENTRIES_PER_WEBSITE,
+        ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+        max_websites=settings.ANSWER_CACHE_MAX_WEBSITES,
+    )
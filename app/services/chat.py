@@ -1,57 +1,202 @@
-import io
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator
 from fastapi import HTTPException, Depends
-from PIL import Image
-import requests
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
-import google.generativeai as genai
 
+from app.core.config import get_settings
+from app.core.sse import sse_event
+from app.core.timing import StageTimer
 from app.models.chat_session import Chat_session
 from app.models.message import MessageSender
-from .scraping import get_embedding
-from app.core.config import get_settings
+from app.models.website import Website
 from app.crud.crud_chat_session import crud_chat_session
 from app.crud.crud_message import crud_message
-from app.crud.crud_scrapedcontent import crud_scraped_content
 from app.schemas.chatbot import ChatRequest, ChatResponse
 from app.schemas.message import MessageCreate
 from app.api.deps import get_db
+from app.db.session import AsyncSessionLocal
+from app.services.clients import ServiceClients, get_clients
+from app.services.retrieval import fuse_rankings
 from ..schemas.chat_session import ChatSessionCreate
 
+FALLBACK_ANSWER = "I'm sorry, I'm having trouble connecting to my brain right now. Please try again later."
+
+# Words that point back at something said earlier ("how much is it?", "do they ship there?")
+REFERRING_WORD_RE = re.compile(
+    r"\b(it|its|they|them|their|this|that|these|those|he|him|his|she|her|there|one|ones|same|"
+    r"above|previous|former|latter|else|other|another)\b", re.IGNORECASE)
+# Follow-ups that only continue the previous turn ("and on weekends?", "what about returns?")
+FOLLOW_UP_START_RE = re.compile(r"^\W*(and|or|but|also|so|then|what about|how about|why not|which)\b", re.IGNORECASE)
+# Anything shorter is likely an ellipsis of an earlier question ("opening hours?")
+MIN_SELF_CONTAINED_WORDS = 4
+
+
+def needs_rewrite(history: str, query: str) -> bool:
+    """
+    Cheap check for whether a question depends on the conversation so far and
+    should be rewritten by the LLM before searching. Errs towards rewriting:
+    a needless rewrite only costs latency, a missed one costs relevance.
+    """
+    if not history.strip():
+        return False
+    if len(query.split()) < MIN_SELF_CONTAINED_WORDS or "..." in query:
+        return True
+    return bool(REFERRING_WORD_RE.search(query) or FOLLOW_UP_START_RE.search(query))
+
+
+@dataclass
+class ChatTurn:
+    """State of one chat turn, gathered before the answer is generated."""
+    session: Chat_session
+    is_first_turn: bool
+    history: str = ""
+    context: list = field(default_factory=list)
+    # Set when the semantic answer cache already has an answer for this question
+    cached_answer: str | None = None
+
 
 class ChatService:
-    def __init__(self, db: AsyncSession = Depends(get_db)):
+    def __init__(self, db: AsyncSession = Depends(get_db), clients: ServiceClients = Depends(get_clients)):
         self.db = db
+        # Created once per worker by the application lifespan; nothing is built per request
+        self.llm = clients.llm
+        self.query_embedder = clients.query_embedder
+        self.retrieval_backend = clients.retrieval_backend
+        self.answer_cache = clients.answer_cache
+        self.history_manager = clients.history_manager
+        self.image_cache = clients.image_cache
         settings = get_settings()
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
-        self.llm_model = genai.GenerativeModel("gemini-1.5-flash-latest")
+        self.speculative_retrieval = settings.SPECULATIVE_RETRIEVAL_ENABLED
+        self.server_timing = settings.SERVER_TIMING_ENABLED
+        self.timings = StageTimer()
+
+    def timing_headers(self) -> dict:
+        """Server-Timing header with the stages of this request timed so far."""
+        if not self.server_timing or not self.timings.durations:
+            return {}
+        return {"Server-Timing": self.timings.header()}
 
     async def process_chat_request(self, chat_request: ChatRequest, auth_data: tuple) -> ChatResponse:
         """The main entrypoint for handling a user's chat message."""
+        turn = await self._prepare_chat_turn(chat_request, auth_data)
+        _, website = auth_data
+
+        if turn.cached_answer is not None:
+            answer = turn.cached_answer
+        else:
+            # Generate a response from the LLM
+            answer = await self._generate_response(website.url, turn.history, turn.context, chat_request.query)
+            await self._store_cached_answer(turn, website, chat_request.query, answer)
+
+        # Save the bot's response to the database
+        await crud_message.create(self.db, obj_in=MessageCreate(
+            chat_session_id=turn.session.id, sender=MessageSender.BOT, text=answer))
+
+        # Return the response to the user
+        return ChatResponse(answer=answer, session_id=str(turn.session.id))
+
+    async def stream_chat_request(self, chat_request: ChatRequest, auth_data: tuple) -> AsyncIterator[str]:
+        """
+        Streaming variant of process_chat_request.
+        Everything up to the LLM call runs before the response starts, so errors
+        (e.g. a missing website) are still returned as regular HTTP errors.
+        Returns an async iterator of Server-Sent Events.
+        """
+        turn = await self._prepare_chat_turn(chat_request, auth_data)
+        _, website = auth_data
+        return self._stream_response(turn, website, chat_request.query)
+
+    async def _prepare_chat_turn(self, chat_request: ChatRequest, auth_data: tuple) -> ChatTurn:
+        """
+        Runs the steps shared by the regular and streaming endpoints:
+        session lookup, saving the user's message, the answer cache, history and retrieval.
+        """
         current_user, website = auth_data
         if not website:
             raise HTTPException(status_code=404, detail="Website not found.")
 
         # Find or create a chat session
         session = await self._find_or_create_session(website.id, chat_request.session_id)
+        is_first_turn = chat_request.session_id != str(session.id)
 
         # Save the user's incoming message to the database
-        await crud_message.create(self.db, obj_in=MessageCreate(
+        user_message = await crud_message.create(self.db, obj_in=MessageCreate(
             chat_session_id=session.id, sender=MessageSender.USER, text=chat_request.query))
 
-        # Get conversation history for the prompt
-        history = await self._get_chat_history(session.id)
+        # A first-turn question doesn't depend on history, so a cached answer can be reused
+        if is_first_turn and self.answer_cache is not None:
+            query_embedding = await self.query_embedder.embed(chat_request.query)
+            if query_embedding:
+                cached_answer = self.answer_cache.lookup(website, query_embedding)
+                if cached_answer is not None:
+                    return ChatTurn(session=session, is_first_turn=True, cached_answer=cached_answer)
+
+        # Get conversation history for the prompt; a new session has none yet
+        history = ""
+        if not is_first_turn:
+            with self.timings.stage("history"):
+                history = await self.history_manager.load(self.db, session, before=user_message.time_created)
         # Find relevant context from scraped data using vector search
-        context = await self._find_relevant_context(website.id, chat_request.query, history)
-        # Generate a response from the LLM
-        answer = self._generate_response(website.url, history, context, chat_request.query)
-
-        # Save the bot's response to the database
-        await crud_message.create(self.db, obj_in=MessageCreate(
-            chat_session_id=session.id, sender=MessageSender.BOT, text=answer))
-
-        # Return the response to the user
-        return ChatResponse(answer=answer, session_id=str(session.id))
+        context = await self._find_relevant_context(website, chat_request.query, history)
+        return ChatTurn(session=session, is_first_turn=is_first_turn, history=history, context=context)
+
+    async def _store_cached_answer(self, turn: ChatTurn, website: Website, query: str, answer: str):
+        if self.answer_cache is None or not turn.is_first_turn or answer == FALLBACK_ANSWER:
+            return
+        # The query was already embedded for the lookup, so this is normally a query-embedding cache hit
+        query_embedding = await self.query_embedder.embed(query)
+        if query_embedding:
+            self.answer_cache.store(website, query_embedding, answer)
+
+    async def _answer_chunks(self, turn: ChatTurn, website: Website, query: str) -> AsyncIterator[str]:
+        """Yields the answer text, either the cached answer in one piece or the LLM stream."""
+        if turn.cached_answer is not None:
+            yield turn.cached_answer
+            return
+
+        prompt_parts = await self._build_prompt(website.url, turn.history, turn.context, query)
+        async for text in self.llm.stream(prompt_parts):
+            yield text
+
+    async def _stream_response(self, turn: ChatTurn, website: Website, query: str) -> AsyncIterator[str]:
+        """
+        Streams the answer as SSE 'token' events and persists the full
+        answer as a BOT message once the stream closes.
+        """
+        session_id = turn.session.id
+        answer_parts = []
+        completed = False
+        try:
+            yield sse_event("session", {"session_id": str(session_id)})
+            try:
+                async for text in self._answer_chunks(turn, website, query):
+                    answer_parts.append(text)
+                    yield sse_event("token", {"text": text})
+                completed = True
+            except Exception:
+                # Same fallback as the non-streaming endpoint if the API call fails
+                # before anything was sent
+                if not answer_parts:
+                    answer_parts.append(FALLBACK_ANSWER)
+                    yield sse_event("token", {"text": FALLBACK_ANSWER})
+            yield sse_event("done", {})
+        finally:
+            answer = "".join(answer_parts)
+            if answer:
+                # Shielded so a client disconnect doesn't cancel the write half-way
+                await asyncio.shield(self._save_bot_message(session_id, answer))
+            if completed and turn.cached_answer is None:
+                await self._store_cached_answer(turn, website, query, answer)
+
+    async def _save_bot_message(self, session_id: uuid.UUID, answer: str):
+        # FastAPI closes the request-scoped session before a StreamingResponse body
+        # is sent, so the streamed answer is saved with its own session.
+        async with AsyncSessionLocal() as db:
+            await crud_message.create(db, obj_in=MessageCreate(
+                chat_session_id=session_id, sender=MessageSender.BOT, text=answer))
 
     async def _find_or_create_session(self, website_id: int, session_id: str | None) -> Chat_session:
         if session_id:
@@ -64,20 +209,7 @@ class ChatService:
         return res
 
 
-    async def _get_chat_history(self, session_id: uuid.UUID) -> str:
-        """
-        Retrieves the most recent messages from a chat session and formats them
-        into a string for use in the prompt.
-        """
-        # Query the database for messages in the current session, ordered by time
-        messages = await crud_message.get_messages_by_session(self.db,session_id = session_id)
-
-        # Reverse the list to get chronological order and format into a "Sender: Text" string
-        history = "\n".join([f"{msg.sender.value}: {msg.text}" for msg in reversed(messages)])
-        return history
-
-
-    def _generate_search_query(self, history: str, query: str) -> str:
+    async def _generate_search_query(self, history: str, query: str) -> str:
         """
         Uses the LLM to rewrite the user's query into a self-contained search term,
         using the conversation history for context. This improves retrieval accuracy.
@@ -98,30 +230,64 @@ class ChatService:
 
         try:
             # Generate the rewritten query and clean it up
-            response = self.llm_model.generate_content(prompt)
-            rewritten_query = response.text.strip().replace('"', '')
+            with self.timings.stage("rewrite"):
+                response_text = await self.llm.generate(prompt)
+            rewritten_query = response_text.strip().replace('"', '')
             return rewritten_query
         except Exception:
             # If the LLM call fails for any reason, fall back to the original query
             return query
 
 
-    async def _find_relevant_context(self, website_id: int, query: str, history: str, top_k: int = 5) -> str:
+    async def _find_relevant_context(self, website: Website, query: str, history: str, top_k: int = 5) -> list:
         """
         Finds the most relevant text chunks from the database using vector similarity search.
-        It first refines the user's query based on chat history for better results.
+        Follow-up questions are first rewritten by the LLM into a self-contained search query;
+        with speculative retrieval the raw question is searched while that rewrite runs.
         """
-        # 1. Use the LLM to generate a better, context-aware search query
-        search_query = self._generate_search_query(history, query)
-
-        # 2. Get the vector embedding for the refined query
-        query_embedding = get_embedding(search_query)
+        with self.timings.stage("retrieval"):
+            if not needs_rewrite(history, query):
+                results = await self._search(website, query, top_k)
+            elif self.speculative_retrieval:
+                results = await self._speculative_search(website, history, query, top_k)
+            else:
+                search_query = await self._generate_search_query(history, query)
+                results = await self._search(website, search_query, top_k)
+        return self._structure_context(results)
+
+    async def _search(self, website: Website, query: str, top_k: int, label: str = "") -> list:
+        """Embeds a search query and runs the similarity search, in Postgres or in memory depending on RETRIEVAL_BACKEND."""
+        with self.timings.stage(f"embed{label}"):
+            query_embedding = await self.query_embedder.embed(query)
         if not query_embedding:
-            return ""
-
-        # 3. Perform a vector similarity search (L2 distance) against the scraped content
-        results= await crud_scraped_content.get_relevant_scraped_content(self.db, website_id = website_id,embedding = query_embedding,top_k = top_k)
+            return []
+        with self.timings.stage(f"search{label}"):
+            return await self.retrieval_backend.search(self.db, website, query_embedding, top_k)
 
+    async def _speculative_search(self, website: Website, history: str, query: str, top_k: int) -> list:
+        """
+        Searches with the raw question while the LLM rewrites it. The raw
+        search normally finishes first, so only the rewritten query's search
+        is left once the rewrite returns; both result lists are then fused.
+        The searches run one after the other, as they share the request's session.
+        """
+        raw_search = asyncio.create_task(self._search(website, query, top_k))
+        try:
+            search_query = await self._generate_search_query(history, query)
+            raw_results = await raw_search
+        except BaseException:
+            raw_search.cancel()
+            raise
+
+        if " ".join(search_query.lower().split()) == " ".join(query.lower().split()):
+            # The rewrite failed or changed nothing
+            return raw_results
+        rewritten_results = await self._search(website, search_query, top_k, label="_rewritten")
+        # The rewritten query carries the conversation's context, so it wins ties
+        return fuse_rankings([rewritten_results, raw_results], top_k)
+
+    @staticmethod
+    def _structure_context(results: list) -> list:
         structured_context = []
         for item in results:
             if item.image_url:
@@ -143,13 +309,10 @@ class ChatService:
         return structured_context
 
 
-    def _generate_response(self, website_url: str, history: str, context: str, query: str) -> str:
+    async def _build_prompt(self, website_url: str, history: str, context: list, query: str) -> list:
         """
-        Builds the final prompt with context and history, then calls the LLM
-        to generate the chatbot's answer.
+        Builds the final prompt with context and history for the LLM.
         """
-
-
         # This detailed prompt sets the persona and rules for the LLM
         prompt_parts = [ f"""You are a friendly and helpful assistant for the website {website_url}. Your goal is to be both a knowledgeable expert about the site and a natural conversationalist.
     
@@ -174,34 +337,43 @@ class ChatService:
         if not context:
             prompt_parts.append("No context was provided. The answer is not available in the website content.")
         else:
+            # All images of the turn load concurrently, normally from the image cache
+            image_urls = [item['url'] for item in context if item['type'] == 'image']
+            images = {}
+            if image_urls:
+                with self.timings.stage("images"):
+                    images = await self.image_cache.load_many(image_urls)
             for item in context:
                 if item['type'] == 'text':
                     prompt_parts.append(f"Text from {item['source']}:\n{item['content']}\n---")
                 elif item['type'] == 'image':
-                    try:
-                        # Fetch the image from its URL
-                        response = requests.get(item['url'], stream=True, timeout=10)
-                        response.raise_for_status()  # Raise an exception for bad status codes
-                        # Open the image using Pillow
-                        image = Image.open(io.BytesIO(response.content))
-
+                    image = images.get(item['url'])
+                    if image is not None:
                         # Add the image and its description to the prompt
                         prompt_parts.append(f"Image from {item['source']} (Description: '{item['description']}'):")
                         prompt_parts.append(image)
                         prompt_parts.append("---\n")
-                    except Exception as e:
-                        print(f"Could not load image from {item['url']}: {e}")
+                    else:
                         prompt_parts.append(f"[Image at {item['url']} could not be loaded]")
 
         # Add the final parts of the prompt
         prompt_parts.append(f"\n--- CONVERSATION HISTORY ---\n{history}")
         prompt_parts.append(f"\n--- CURRENT QUESTION ---\nUser: {query}\n\nAssistant's Response:")
 
+        return prompt_parts
+
+    async def _generate_response(self, website_url: str, history: str, context: str, query: str) -> str:
+        """
+        Builds the final prompt with context and history, then calls the LLM
+        to generate the chatbot's answer.
+        """
+        prompt_parts = await self._build_prompt(website_url, history, context, query)
+
         try:
             # Send the complete prompt to the LLM and return its response text
-            response = self.llm_model.generate_content(prompt_parts)
-            return response.text
+            with self.timings.stage("llm"):
+                return await self.llm.generate(prompt_parts)
         except Exception as e:
             # Provide a fallback message if the API call fails
-            return "I'm sorry, I'm having trouble connecting to my brain right now. Please try again later."
+            return FALLBACK_ANSWER
 
@@ -0,0 +1,149 @@
+import asyncio
+import uuid
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.crud.crud_chat_session import crud_chat_session
+from app.crud.crud_message import crud_message
+from app.db.session import AsyncSessionLocal
+from app.models.chat_session import Chat_session
+from app.models.message import Message
+from app.services.chunking import estimate_tokens
+from app.services.llm import LLMClient, get_llm_client
+
+SUMMARY_LABEL = "Summary of the earlier conversation"
+
+
+class ChatHistoryManager:
+    """
+    Builds the conversation history block of the chat prompt.
+
+    Only the last `window_turns` question/answer pairs are read, newest first
+    through the messages_time_created_desc index, so a turn costs the same
+    however long the session is. Older turns are represented by the session's
+    rolling summary, which is brought up to date in the background after the
+    answer is on its way. The whole block is kept within `max_tokens`: the
+    summary comes first, then as many of the newest messages as fit.
+    """
+
+    def __init__(self, llm: LLMClient, window_turns: int, max_tokens: int, summary_enabled: bool,
+                 summary_max_tokens: int, summary_batch_messages: int):
+        self.llm = llm
+        self.window_messages = window_turns * 2
+        self.max_tokens = max_tokens
+        self.summary_enabled = summary_enabled
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_batch_messages = summary_batch_messages
+        # One summary update per session at a time; also keeps the tasks referenced until they finish
+        self._refreshing: dict[uuid.UUID, asyncio.Task] = {}
+
+    async def load(self, db: AsyncSession, session: Chat_session, before: datetime | None = None) -> str:
+        """The history block for a session, from the messages sent before `before` (the current question)."""
+        # One extra row tells whether anything older than the window exists
+        messages = await crud_message.get_recent_messages(db, session.id, limit=self.window_messages + 1, before=before)
+        has_older = len(messages) > self.window_messages
+        window = list(reversed(messages[:self.window_messages]))
+
+        summary = session.summary if self.summary_enabled else None
+        if has_older and self.summary_enabled:
+            self.schedule_summary(session.id, window[0].time_created)
+        return self.format(summary, window)
+
+    def format(self, summary: str | None, messages: list[Message]) -> str:
+        lines: list[str] = []
+        budget = self.max_tokens
+        if summary:
+            # Recent turns matter more than the summary, which never takes more than half the budget
+            summary_line = self._truncate(f"{SUMMARY_LABEL}: {summary}", budget // 2)
+            budget -= estimate_tokens(summary_line)
+            lines.append(summary_line)
+
+        recent: list[str] = []
+        for message in reversed(messages):
+            line = f"{message.sender.value}: {message.text}"
+            tokens = estimate_tokens(line)
+            if tokens > budget:
+                # The newest message is always kept, cut to what's left of the budget
+                if not recent and budget > 0:
+                    recent.append(self._truncate(line, budget))
+                break
+            recent.append(line)
+            budget -= tokens
+
+        return "\n".join(lines + list(reversed(recent)))
+
+    def schedule_summary(self, session_id: uuid.UUID, window_start: datetime):
+        """Folds the messages older than `window_start` into the session's summary, in the background."""
+        task = self._refreshing.get(session_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._refresh_summary(session_id, window_start))
+        self._refreshing[session_id] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(session_id, None))
+
+    async def _refresh_summary(self, session_id: uuid.UUID, window_start: datetime):
+        try:
+            # Its own session: the request's session is closed by the time this runs
+            async with AsyncSessionLocal() as db:
+                session = await crud_chat_session.get(db, id=session_id)
+                if session is None:
+                    return
+                summary, summarized_until = session.summary, session.summarized_until
+                while True:
+                    messages = await crud_message.get_messages_between(
+                        db, session_id, after=summarized_until, before=window_start,
+                        limit=self.summary_batch_messages)
+                    if not messages:
+                        return
+                    summary = await self._summarize(summary, messages)
+                    summarized_until = messages[-1].time_created
+                    await crud_chat_session.update_summary(db, session_id, summary, summarized_until)
+                    if len(messages) < self.summary_batch_messages:
+                        return
+        except Exception as e:
+            # The next turn tries again; until then the previous summary is used
+            print(f"  [!] Could not update the summary of chat session {session_id}: {e}")
+
+    async def _summarize(self, summary: str | None, messages: list[Message]) -> str:
+        transcript = "\n".join(f"{message.sender.value}: {message.text}" for message in messages)
+        prompt = f"""Update the running summary of a conversation between a website visitor ("user") and the website's assistant ("bot") with the new messages below.
+        Keep the facts, names, preferences and open questions that later questions may refer to. Drop greetings and small talk.
+        Answer with the updated summary only, in at most {self.summary_max_tokens * 3 // 4} words.
+
+        CURRENT SUMMARY:
+        {summary or "(none yet)"}
+
+        NEW MESSAGES:
+        {transcript}
+
+        Updated Summary:"""
+        response_text = await self.llm.generate(prompt)
+        return self._truncate(response_text.strip(), self.summary_max_tokens)
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        kept, tokens = [], 0
+        for word in text.split():
+            tokens += estimate_tokens(word)
+            if tokens > max_tokens:
+                break
+            kept.append(word)
+        return " ".join(kept) + " ..."
+
+
+@lru_cache
+def get_history_manager() -> ChatHistoryManager:
+    settings = get_settings()
+    return ChatHistoryManager(
+        get_llm_client(),
+        window_turns=settings.CHAT_HISTORY_WINDOW_TURNS,
+        max_tokens=settings.CHAT_HISTORY_MAX_TOKENS,
+        summary_enabled=settings.CHAT_SUMMARY_ENABLED,
+        summary_max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+        summary_batch_messages=settings.CHAT_SUMMARY_BATCH_MESSAGES,
+    )
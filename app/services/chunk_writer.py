@@ -0,0 +1,78 @@
+import io
+import struct
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.scrapedcontent import ScrapedContent
+
+COPY_COLUMNS = ("website_id", "source_url", "text_content", "image_url", "content_hash", "embedding")
+COPY_STATEMENT = (
+    f"COPY {ScrapedContent.__tablename__} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT binary)"
+)
+
+# Signature, flags and header extension length of PostgreSQL's binary COPY format
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+NULL_FIELD = struct.pack("!i", -1)
+ROW_HEADER = struct.pack("!h", len(COPY_COLUMNS))
+
+
+def _text_field(value: str | None) -> bytes:
+    if value is None:
+        return NULL_FIELD
+    data = value.encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _vector_field(embedding) -> bytes:
+    """pgvector's binary representation: int16 dimensions, int16 unused, then big-endian float4 values."""
+    if embedding is None:
+        return NULL_FIELD
+    values = np.asarray(embedding, dtype=">f4")
+    return struct.pack("!ihh", 4 + values.nbytes, len(values), 0) + values.tobytes()
+
+
+def encode_copy_rows(rows: list[dict]) -> bytes:
+    """Encodes scraped_content rows as one binary COPY stream (header, tuples, trailer)."""
+    buffer = io.BytesIO()
+    buffer.write(PGCOPY_HEADER)
+    for row in rows:
+        buffer.write(ROW_HEADER)
+        buffer.write(struct.pack("!ii", 4, row["website_id"]))
+        buffer.write(_text_field(row.get("source_url")))
+        buffer.write(_text_field(row["text_content"]))
+        buffer.write(_text_field(row.get("image_url")))
+        buffer.write(_text_field(row.get("content_hash")))
+        buffer.write(_vector_field(row.get("embedding")))
+    buffer.write(PGCOPY_TRAILER)
+    return buffer.getvalue()
+
+
+class ScrapedContentWriter:
+    """
+    Bulk-inserts scraped_content rows in the caller's transaction.
+
+    By default each call streams the rows to Postgres with one binary COPY, so
+    embeddings are sent as raw float4 values instead of being formatted and
+    parsed as '[0.1,0.2,...]' text literals. COPY needs the psycopg2 driver;
+    with use_copy=False the rows go through an executemany INSERT instead.
+    """
+
+    def __init__(self, db: Session, use_copy: bool = True):
+        self.db = db
+        self.use_copy = use_copy
+
+    def write(self, rows: list[dict]):
+        if not rows:
+            return
+        if not self.use_copy:
+            # A list of parameter sets makes SQLAlchemy use executemany for the insert
+            self.db.execute(insert(ScrapedContent), rows)
+            return
+
+        # The session's own DB-API connection, so the COPY joins its transaction
+        dbapi_connection = self.db.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(COPY_STATEMENT, io.BytesIO(encode_copy_rows(rows)))
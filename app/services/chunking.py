@@ -0,0 +1,247 @@
+import math
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+from app.core.config import get_settings
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'“(\[]?[A-Z0-9])")
+ESTIMATE_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# The "Page Title:/Section:" header Chunker._prefix puts in front of every chunk
+CHUNK_PREFIX_RE = re.compile(r"\APage Title: [^\n]*\n(?:Section: [^\n]*\n)?\n")
+# WordPiece keeps common words whole and splits rarer, longer ones into pieces of roughly this many characters
+ESTIMATE_CHARS_PER_PIECE = 6
+
+TokenCounter = Callable[[str], int]
+
+
+@dataclass(frozen=True)
+class Block:
+    """A paragraph-level piece of a document (paragraph, list item, table row, PDF text block)."""
+    text: str
+    # Headings the block sits under, outermost first
+    headings: tuple[str, ...] = ()
+
+
+class HeadingPath:
+    """The headings above the current point of a document, kept up to date as it is read in order."""
+
+    def __init__(self):
+        self._stack: list[tuple[int, str]] = []
+
+    def enter(self, level: int, text: str):
+        while self._stack and self._stack[-1][0] >= level:
+            self._stack.pop()
+        self._stack.append((level, text))
+
+    def clear(self):
+        self._stack.clear()
+
+    @property
+    def headings(self) -> tuple[str, ...]:
+        return tuple(text for _, text in self._stack)
+
+
+@dataclass
+class _Unit:
+    """A sentence (or a piece of an overlong one), the smallest thing the chunker moves around."""
+    text: str
+    tokens: int
+    # The first unit of a block is joined with a blank line rather than a space
+    starts_block: bool
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough WordPiece token count, erring on the high side, for when the real tokenizer isn't available."""
+    return sum(
+        math.ceil(len(piece) / ESTIMATE_CHARS_PER_PIECE) if piece[0].isalnum() or piece[0] == "_" else 1
+        for piece in ESTIMATE_TOKEN_RE.findall(text)
+    )
+
+
+def chunk_body(chunk: str) -> str:
+    """A chunk's text without its page title and section header, i.e. what repeats when boilerplate does."""
+    return CHUNK_PREFIX_RE.sub("", chunk, count=1)
+
+
+@lru_cache
+def get_token_counter() -> TokenCounter:
+    """
+    Counts tokens with the embedding model's own tokenizer, so chunk budgets
+    match what the model actually reads. Falls back to estimate_tokens when
+    the model can't be loaded (e.g. offline, or in benchmarks without it).
+
+    The counter has its own tokenizer instance: the model's is switched to
+    truncation and padding by every encode() call, which may run on another
+    thread while pages are chunked, and would then fail with "Already borrowed"
+    or cap counts at max_seq_length.
+    """
+    try:
+        from transformers import AutoTokenizer
+
+        from app.services.embedding import get_embedding_model
+        tokenizer = AutoTokenizer.from_pretrained(get_embedding_model().tokenizer.name_or_path)
+    except Exception as e:
+        print(f"  [!] Embedding tokenizer unavailable ({e}), estimating token counts")
+        return estimate_tokens
+    # Whole blocks are counted before they are split, so texts longer than the model reads are expected
+    tokenizer.model_max_length = sys.maxsize
+    # Chunking runs on several crawler threads at once
+    lock = threading.Lock()
+
+    def count_tokens(text: str) -> int:
+        with lock:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+
+    return count_tokens
+
+class Chunker:
+    """
+    Turns a document's blocks into chunks sized for the embedding model.
+
+    Chunks never cross a heading: every section is packed on its own, a
+    sentence at a time, until the next sentence would exceed `max_tokens`
+    (counting the "Page Title:/Section:" prefix each chunk carries). Sentences
+    longer than that are split between words. Consecutive chunks of a section
+    share up to `overlap_tokens` of trailing sentences, so an answer cut at a
+    chunk boundary is still found whole. Sections shorter than `min_tokens`
+    are merged with the sections after them rather than stored as tiny chunks.
+    """
+
+    def __init__(self, max_tokens: int | None = None, overlap_tokens: int | None = None,
+                 min_tokens: int | None = None, count_tokens: TokenCounter | None = None):
+        settings = get_settings()
+        self.max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS
+        self.overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.min_tokens = settings.CHUNK_MIN_TOKENS if min_tokens is None else min_tokens
+        self.count_tokens = count_tokens or get_token_counter()
+
+    def chunk(self, blocks: list[Block], title: str = "") -> list[str]:
+        sections: list[tuple[tuple[str, ...], list[Block]]] = []
+        for block in blocks:
+            if block.text.strip():
+                if sections and sections[-1][0] == block.headings:
+                    sections[-1][1].append(block)
+                else:
+                    sections.append((block.headings, [block]))
+
+        chunks = []
+        group: list[tuple[tuple[str, ...], list[Block]]] = []
+        group_tokens = 0
+        for index, (headings, section_blocks) in enumerate(sections):
+            group.append((headings, section_blocks))
+            group_tokens += sum(self.count_tokens(block.text) for block in section_blocks)
+            if group_tokens < self.min_tokens and index < len(sections) - 1:
+                # Too small to stand alone: merge it with the sections that follow
+                continue
+            chunks.extend(self._pack_section(title, *self._merge(group)))
+            group, group_tokens = [], 0
+        return chunks
+
+    @staticmethod
+    def _merge(group: list[tuple[tuple[str, ...], list[Block]]]) -> tuple[tuple[str, ...], list[Block]]:
+        """
+        Joins consecutive sections under the headings they share; the rest of
+        each section's heading path becomes a line of text in front of it.
+        """
+        if len(group) == 1:
+            return group[0]
+        shared = group[0][0]
+        for headings, _ in group[1:]:
+            length = 0
+            while length < min(len(shared), len(headings)) and shared[length] == headings[length]:
+                length += 1
+            shared = shared[:length]
+
+        blocks = []
+        for headings, section_blocks in group:
+            if len(headings) > len(shared):
+                blocks.append(Block(" > ".join(headings[len(shared):]), shared))
+            blocks.extend(section_blocks)
+        return shared, blocks
+
+    def _prefix(self, title: str, headings: tuple[str, ...]) -> str:
+        prefix = f"Page Title: {title}\n"
+        if headings:
+            prefix += f"Section: {' > '.join(headings)}\n"
+        return prefix + "\n"
+
+    def _pack_section(self, title: str, headings: tuple[str, ...], blocks: list[Block]) -> list[str]:
+        prefix = self._prefix(title, headings)
+        # Never let a long title and heading path squeeze the body to nothing
+        budget = max(self.max_tokens - self.count_tokens(prefix), self.max_tokens // 2)
+        units = [unit for block in blocks for unit in self._units(block.text, budget)]
+
+        chunks = []
+        current: list[_Unit] = []
+        current_tokens = 0
+        for unit in units:
+            if current and current_tokens + unit.tokens > budget:
+                chunks.append(prefix + self._join(current))
+                current = self._overlap(current, budget - unit.tokens)
+                current_tokens = sum(u.tokens for u in current)
+            current.append(unit)
+            current_tokens += unit.tokens
+        if current:
+            chunks.append(prefix + self._join(current))
+        return chunks
+
+    def _overlap(self, units: list[_Unit], room: int) -> list[_Unit]:
+        """The trailing units of a finished chunk that are repeated at the start of the next one."""
+        limit = min(self.overlap_tokens, room)
+        tail: list[_Unit] = []
+        tokens = 0
+        for unit in reversed(units):
+            if tokens + unit.tokens > limit:
+                break
+            tail.insert(0, unit)
+            tokens += unit.tokens
+        if len(tail) == len(units):
+            # A chunk made entirely of overlap would only repeat the previous one
+            return []
+        return tail
+
+    def _units(self, text: str, budget: int) -> list[_Unit]:
+        units = []
+        for sentence in SENTENCE_END_RE.split(" ".join(text.split())):
+            tokens = self.count_tokens(sentence)
+            pieces = [(sentence, tokens)] if tokens <= budget else self._split_words(sentence, tokens, budget)
+            for piece, piece_tokens in pieces:
+                units.append(_Unit(piece, piece_tokens, starts_block=not units))
+        return units
+
+    def _split_words(self, sentence: str, tokens: int, budget: int) -> list[tuple[str, int]]:
+        """Cuts an overlong sentence into runs of words that each fit the budget."""
+        words = sentence.split()
+        # Start from the average token cost per word, and shrink a piece until it fits
+        step = max(int(len(words) * budget / tokens), 1)
+        pieces = []
+        start = 0
+        while start < len(words):
+            end = min(start + step, len(words))
+            piece = " ".join(words[start:end])
+            piece_tokens = self.count_tokens(piece)
+            while piece_tokens > budget and end - start > 1:
+                end = start + max((end - start) * budget // piece_tokens, 1)
+                piece = " ".join(words[start:end])
+                piece_tokens = self.count_tokens(piece)
+            pieces.append((piece, piece_tokens))
+            start = end
+        return pieces
+
+    @staticmethod
+    def _join(units: list[_Unit]) -> str:
+        parts = []
+        for unit in units:
+            if parts:
+                parts.append("\n\n" if unit.starts_block else " ")
+            parts.append(unit.text)
+        return "".join(parts)
+
+
+@lru_cache
+def get_chunker() -> Chunker:
+    return Chunker()
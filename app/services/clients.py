@@ -0,0 +1,98 @@
+"""
+The long-lived clients of an API worker, created once by the application
+lifespan and warmed up before the worker reports itself ready.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from fastapi import Request
+
+from app.core.config import get_settings
+from app.services.answer_cache import SemanticAnswerCache, get_answer_cache
+from app.services.chat_history import ChatHistoryManager, get_history_manager
+from app.services.embedding import QueryEmbedder, get_embedding_model, get_query_embedder
+from app.services.image_cache import ImageCache, get_image_cache
+from app.services.llm import LLMClient, get_llm_client
+from app.services.retrieval import RetrievalBackend, get_retrieval_backend
+from app.services.scrape_progress import get_progress_broadcaster
+
+WARMUP_QUERY = "What are your opening hours?"
+WARMUP_PROMPT = "Reply with the single word OK."
+
+
+@dataclass
+class ServiceClients:
+    llm: LLMClient
+    query_embedder: QueryEmbedder
+    retrieval_backend: RetrievalBackend
+    history_manager: ChatHistoryManager
+    image_cache: ImageCache
+    answer_cache: SemanticAnswerCache | None
+    # Outcome and duration of each warm-up step, reported by the readiness endpoint
+    warmup: dict[str, str] = field(default_factory=dict)
+    ready: bool = False
+
+
+def create_clients() -> ServiceClients:
+    """Builds every client through its process-wide getter, so code outside a request shares the same instances."""
+    return ServiceClients(
+        llm=get_llm_client(),
+        query_embedder=get_query_embedder(),
+        retrieval_backend=get_retrieval_backend(),
+        history_manager=get_history_manager(),
+        image_cache=get_image_cache(),
+        answer_cache=get_answer_cache(),
+    )
+
+
+async def warm_up(clients: ServiceClients):
+    """
+    Pays the cold-start costs before the first chat does: loading (or
+    downloading) the embedding model, a first encode through the query
+    embedder's thread pool, and optionally a tiny Gemini call that opens the
+    API connection. The worker is ready once the embedding model works; a
+    failed LLM warm-up is only reported, as chats fall back to a canned answer.
+    """
+    settings = get_settings()
+    embedding_ok = await _warm_up_step(clients, "embedding_model", asyncio.to_thread(get_embedding_model))
+    if embedding_ok:
+        embedding_ok = await _warm_up_step(clients, "query_embedder", clients.query_embedder.embed(WARMUP_QUERY))
+    if settings.LLM_WARMUP_ENABLED:
+        await _warm_up_step(clients, "llm", clients.llm.generate(WARMUP_PROMPT))
+    clients.ready = embedding_ok
+    print(f"Warm-up finished ({'ready' if clients.ready else 'not ready'}): {clients.warmup}")
+
+
+async def _warm_up_step(clients: ServiceClients, name: str, step) -> bool:
+    start = time.perf_counter()
+    try:
+        await step
+    except Exception as e:
+        print(f"  [!] Warm-up of {name} failed: {e}")
+        clients.warmup[name] = f"failed: {type(e).__name__}"
+        return False
+    clients.warmup[name] = f"ok in {time.perf_counter() - start:.2f}s"
+    return True
+
+
+def cache_stats(clients: ServiceClients) -> dict:
+    """Hit and miss counters of this worker's query-embedding and answer caches (None when disabled)."""
+    embedding_cache = clients.query_embedder.cache
+    return {
+        "query_embeddings": embedding_cache.stats() if embedding_cache is not None else None,
+        "answers": clients.answer_cache.stats() if clients.answer_cache is not None else None,
+    }
+
+
+async def close_clients(clients: ServiceClients):
+    clients.ready = False
+    print(f"Cache stats at shutdown: {cache_stats(clients)}")
+    clients.query_embedder.close()
+    clients.image_cache.close()
+    await get_progress_broadcaster().close()
+
+
+def get_clients(request: Request) -> ServiceClients:
+    """Dependency returning the clients the application lifespan created for this worker."""
+    return request.app.state.clients
@@ -0,0 +1,342 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from urllib.parse import urlparse
+
+import requests
+from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+
+from app.services.frontier import CrawlFrontier, FrontierEntry, normalize_url
+from app.services.site_discovery import RobotsRules, iter_sitemap_entries
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36"
+
+
+# Responses that mean a page no longer exists, as opposed to a temporary failure
+GONE_STATUSES = (404, 410)
+
+
+@dataclass
+class FetchedDocument:
+    """
+    One fetched URL: rendered HTML for web pages, raw bytes for PDF/Word documents.
+    A 304 (unchanged since the validators sent) or 404/410 (gone) response
+    arrives with its status and no content.
+    """
+    url: str
+    content_type: str
+    html: str | None = None
+    body: bytes | None = None
+    status: int = 200
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+    @property
+    def gone(self) -> bool:
+        return self.status in GONE_STATUSES
+
+
+@dataclass
+class Download:
+    """A response body read by the crawler's HTTP session, before any parsing or rendering."""
+    url: str  # Final URL, after redirects
+    status: int
+    content_type: str
+    kind: str | None  # 'html', 'pdf' or 'word'; None for bodiless 304/404/410 responses
+    headers: dict
+    body: bytes
+
+
+@dataclass
+class CrawlStats:
+    pages_visited: int = 0
+    pages_failed: int = 0
+    pages_not_modified: int = 0
+    bytes_downloaded: int = 0
+    elapsed_seconds: float = 0.0
+    # True when every reachable URL was visited, rather than the page budget running out
+    frontier_exhausted: bool = False
+    # Most recent page failure, shown on the dashboard while the crawl runs
+    last_error: str | None = None
+
+
+# Receives every fetched document and returns the absolute URLs of the links found in it
+DocumentHandler = Callable[[FetchedDocument], Awaitable[list[str]]]
+# Returns extra request headers for a URL, e.g. If-None-Match from a previous crawl
+ConditionalHeaders = Callable[[str], dict[str, str]]
+
+
+class DomainRateLimiter:
+    """
+    Politeness limiter: request starts to the same domain are spaced at least
+    `min_interval` seconds apart, no matter how many workers are running.
+    Other domains are not slowed down.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._intervals: dict[str, float] = {}
+        self._next_slot: dict[str, float] = {}
+
+    def set_interval(self, domain: str, interval: float):
+        """Overrides the spacing for one domain."""
+        self._intervals[domain] = interval
+
+    async def wait(self, url: str):
+        domain = urlparse(url).netloc
+        interval = self._intervals.get(domain, self.min_interval)
+        now = time.monotonic()
+        # Reserve the next free slot before sleeping, so concurrent workers queue up behind each other
+        slot = max(now, self._next_slot.get(domain, now))
+        self._next_slot[domain] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Crawler:
+    """
+    Concurrent same-domain crawler built on Playwright's async API.
+
+    `concurrency` workers share one browser context, each with its own page,
+    and pull URLs from a shared frontier until the page budget is used up or
+    no work is left. Before the first page, robots.txt is read (its disallow
+    rules and crawl-delay are honoured) and the frontier is seeded from the
+    site's sitemaps, so orphan pages are found too. Content extraction and storage are delegated to
+    `handle_document`, so the engine itself knows nothing about chunks or the database.
+    """
+
+    def __init__(
+            self,
+            start_url: str,
+            handle_document: DocumentHandler,
+            max_pages: int,
+            concurrency: int,
+            politeness_delay: float,
+            page_timeout_ms: int = 30000,
+            wait_until: str = "load",
+            max_document_bytes: int = 25 * 1024 * 1024,
+            frontier_strategy: str = "shallow_first",
+            max_depth: int | None = None,
+            keep_query_params: bool = False,
+            respect_robots: bool = True,
+            use_sitemaps: bool = True,
+            sitemap_max_urls: int = 50000,
+            max_crawl_delay: float = 10.0,
+            conditional_headers: ConditionalHeaders | None = None,
+    ):
+        self.start_url = normalize_url(start_url, keep_query=keep_query_params) or start_url
+        self.handle_document = handle_document
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.page_timeout_ms = page_timeout_ms
+        self.wait_until = wait_until
+        self.max_document_bytes = max_document_bytes
+        self.respect_robots = respect_robots
+        self.use_sitemaps = use_sitemaps
+        self.sitemap_max_urls = sitemap_max_urls
+        self.max_crawl_delay = max_crawl_delay
+        self.conditional_headers = conditional_headers
+        self.robots: RobotsRules | None = None
+        self.rate_limiter = DomainRateLimiter(politeness_delay)
+        self.stats = CrawlStats()
+
+        self.frontier = CrawlFrontier(
+            allowed_host=urlparse(self.start_url).netloc,
+            strategy=frontier_strategy,
+            max_depth=max_depth,
+            keep_query=keep_query_params,
+            url_filter=self._allowed_by_robots,
+        )
+        self._in_progress = 0
+        self._condition = asyncio.Condition()
+        # One keep-alive HTTP session shared by all workers
+        self._session = requests.Session()
+        self._session.headers['User-Agent'] = USER_AGENT
+
+    async def run(self, browser: Browser | None = None) -> CrawlStats:
+        """Crawls the site. Launches its own headless Chromium unless a running browser is passed in."""
+        started = time.perf_counter()
+        if browser is not None:
+            await self._crawl(browser)
+        else:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True)
+                try:
+                    await self._crawl(browser)
+                finally:
+                    await browser.close()
+        self._session.close()
+        self.stats.elapsed_seconds = time.perf_counter() - started
+        return self.stats
+
+    async def _crawl(self, browser: Browser):
+        await asyncio.to_thread(self._discover)
+        self.frontier.push(self.start_url, depth=0)
+
+        context = await browser.new_context(user_agent=USER_AGENT)
+        try:
+            pages = [await context.new_page() for _ in range(self.concurrency)]
+            await asyncio.gather(*(self._worker(page) for page in pages))
+        finally:
+            await context.close()
+
+    async def _worker(self, page: Page):
+        while (entry := await self._claim_next()) is not None:
+            url = entry.url
+            links = []
+            try:
+                print(f"\nVisiting: {url}")
+                links = await self._visit(page, url)
+            except PlaywrightTimeoutError:
+                print(f"  [!] Timeout visiting {url}")
+                self.stats.pages_failed += 1
+                self.stats.last_error = f"Timeout visiting {url}"
+            except Exception as e:
+                print(f"  [!] Error processing {url}: {e}")
+                self.stats.pages_failed += 1
+                self.stats.last_error = f"Error processing {url}: {e}"
+            finally:
+                await self._complete(entry, links)
+
+    def _discover(self):
+        """Reads robots.txt and seeds the frontier with the URLs listed in the site's sitemaps."""
+        if not (self.respect_robots or self.use_sitemaps):
+            return
+
+        robots = RobotsRules.fetch(self._session, self.start_url)
+        if self.respect_robots:
+            self.robots = robots
+            delay = robots.crawl_delay(USER_AGENT)
+            if delay is not None:
+                domain = urlparse(self.start_url).netloc
+                interval = min(max(delay, self.rate_limiter.min_interval), self.max_crawl_delay)
+                self.rate_limiter.set_interval(domain, interval)
+                print(f"  > robots.txt crawl-delay: {delay}s (using {interval}s)")
+
+        if self.use_sitemaps:
+            seeded = 0
+            for entry in iter_sitemap_entries(self._session, robots.sitemaps(), self.sitemap_max_urls):
+                if self.frontier.push(entry.url, depth=0, priority=entry.priority,
+                                      from_sitemap=True, lastmod=entry.lastmod):
+                    seeded += 1
+            print(f"  > Seeded {seeded} URLs from sitemaps")
+
+    def _allowed_by_robots(self, url: str) -> bool:
+        return self.robots is None or self.robots.can_fetch(USER_AGENT, url)
+
+    async def _claim_next(self) -> FrontierEntry | None:
+        """Waits for the next URL to visit. Returns None once the crawl is finished."""
+        async with self._condition:
+            while True:
+                if self.stats.pages_visited >= self.max_pages:
+                    return None
+                if len(self.frontier):
+                    self.stats.pages_visited += 1
+                    self._in_progress += 1
+                    return self.frontier.pop()
+                if self._in_progress == 0:
+                    # Nothing queued and nobody can discover new links anymore
+                    self.stats.frontier_exhausted = True
+                    return None
+                await self._condition.wait()
+
+    async def _complete(self, entry: FrontierEntry, links: list[str]):
+        async with self._condition:
+            for link in links:
+                # The frontier canonicalizes, de-duplicates and filters off-site links
+                self.frontier.push(link, depth=entry.depth + 1)
+            self._in_progress -= 1
+            self._condition.notify_all()
+
+    async def _visit(self, page: Page, url: str) -> list[str]:
+        await self.rate_limiter.wait(url)
+        document = await self._fetch(page, url)
+        if document is None:
+            return []
+        return await self.handle_document(document)
+
+    async def _fetch(self, page: Page, url: str) -> FetchedDocument | None:
+        """
+        Downloads a URL exactly once. The response headers decide what happens next:
+        PDF/Word bodies go straight to the handlers, HTML is handed to Playwright
+        from memory for rendering, and anything else is dropped before its body is read.
+        Error statuses other than 404/410 raise requests.HTTPError, so the page counts as failed.
+        """
+        download = await asyncio.to_thread(self._download, url)
+        if download is None:
+            return None
+
+        if download.kind is None:
+            if download.status == 304:
+                self.stats.pages_not_modified += 1
+            # Reported under the requested URL, which is what the previous crawl stored
+            return FetchedDocument(url=url, content_type=download.content_type, status=download.status)
+
+        etag, last_modified = download.headers.get('ETag'), download.headers.get('Last-Modified')
+        if download.kind == "html":
+            html = await self._render(page, download)
+            return FetchedDocument(url=download.url, content_type=download.content_type, html=html,
+                                   etag=etag, last_modified=last_modified)
+
+        return FetchedDocument(url=download.url, content_type=download.content_type, body=download.body,
+                               etag=etag, last_modified=last_modified)
+
+    def _download(self, url: str) -> Download | None:
+        headers = self.conditional_headers(url) if self.conditional_headers else None
+        with self._session.get(url, stream=True, timeout=15, headers=headers) as r:
+            content_type = r.headers.get('content-type', '').lower()
+            if r.status_code == 304 or r.status_code in GONE_STATUSES:
+                return Download(url=r.url, status=r.status_code, content_type=content_type,
+                                kind=None, headers=dict(r.headers), body=b"")
+
+            # Server errors, 429 and the like are failures, not skipped pages
+            r.raise_for_status()
+            kind = _document_kind(content_type)
+            if kind is None:
+                return None
+
+            body = bytearray()
+            for block in r.iter_content(chunk_size=64 * 1024):
+                body.extend(block)
+                if len(body) > self.max_document_bytes:
+                    print(f"  [!] Skipping {url}: larger than {self.max_document_bytes} bytes")
+                    return None
+            self.stats.bytes_downloaded += len(body)
+
+            headers = {
+                name: value for name, value in r.headers.items()
+                # requests has already decoded the body, so these no longer apply
+                if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+            }
+            return Download(url=r.url, status=r.status_code, content_type=content_type,
+                            kind=kind, headers=headers, body=bytes(body))
+
+    async def _render(self, page: Page, download: Download) -> str:
+        """Renders already-downloaded HTML: the navigation request is answered from memory."""
+        async def fulfill(route):
+            await route.fulfill(status=download.status, headers=download.headers, body=download.body)
+
+        def is_document(request_url: str) -> bool:
+            return request_url == download.url
+
+        await page.route(is_document, fulfill)
+        try:
+            await page.goto(download.url, timeout=self.page_timeout_ms, wait_until=self.wait_until)
+        finally:
+            await page.unroute(is_document, fulfill)
+        return await page.content()
+
+
+def _document_kind(content_type: str) -> str | None:
+    if 'application/pdf' in content_type:
+        return "pdf"
+    if 'word' in content_type:  # Catches .doc, .docx
+        return "word"
+    if 'text/html' in content_type:
+        return "html"
+    return None
@@ -1,12 +1,13 @@
-import multiprocessing
 import uuid
+from app.core.api_key_cache import verified_key_cache
 from app.crud.crud_apikey import crud_api_key
+from app.crud.crud_scrape_job import crud_scrape_job
 from app.crud.crud_website import crud_website
 from app.models.user import User
+from app.models.website import ScrapingStatus
 from fastapi import HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.website import WebsiteCreate
-from app.services.scraping import scrape_site
 from app.api.deps import get_db
 
 
@@ -18,13 +19,8 @@ class DashboardService:
         existing_website = await crud_website.get_website_by_url(self.db, url=website_data.url)
 
         if existing_website is None:
-            new_website = await crud_website.create(self.db, obj_in=website_data)
-
-            scraper_process = multiprocessing.Process(
-                target=scrape_site,
-                args=(new_website.url, new_website.id)
-            )
-            scraper_process.start()
+            # A scraper worker (python -m app.workers.scraper) picks the job up
+            new_website = await crud_website.create_with_scrape_job(self.db, obj_in=website_data)
             web_id = new_website.id
         else:
             web_id = existing_website.id
@@ -35,6 +31,19 @@ class DashboardService:
 
         return key_str
 
+    async def refresh_website(self, website_id: int, current_user: User):
+        """Queues an incremental re-crawl that only re-embeds what changed since the last scrape."""
+        website = await crud_website.get(self.db, id=website_id)
+        if not website:
+            raise HTTPException(status_code=404, detail="Website not found")
+        if website.owner_id != current_user.id:
+            raise HTTPException(status_code=401, detail="Website doesn't belong to current user")
+        if (website.scraping_status != ScrapingStatus.COMPLETED
+                or await crud_scrape_job.get_active_for_website(self.db, website_id=website.id)):
+            raise HTTPException(status_code=409, detail="Website is already being scraped")
+
+        await crud_scrape_job.enqueue(self.db, website_id=website.id, incremental=True)
+
     async def delete_api_key(self, key_id: uuid.UUID, current_user: User):
         key_to_delete = await crud_api_key.get_key_with_full_details(self.db, key_id=key_id)
         if not key_to_delete:
@@ -45,5 +54,7 @@ class DashboardService:
         website = key_to_delete.website
         if len(website.api_keys) == 1:
             await crud_website.remove(self.db, id=website.id)
+            verified_key_cache.invalidate_website(website.id)
         else:
-            await crud_api_key.remove(self.db, id=key_to_delete.id)
\ No newline at end of file
+            await crud_api_key.remove(self.db, id=key_to_delete.id)
+            verified_key_cache.invalidate_key(key_to_delete.id)
\ No newline at end of file
@@ -0,0 +1,119 @@
+import hashlib
+import re
+
+import numpy as np
+
+from app.services.chunking import chunk_body
+
+SIMHASH_BITS = 64
+# Texts shorter than this many words give unstable fingerprints and are left to exact dedup
+MIN_SIMHASH_WORDS = 8
+WORD_RE = re.compile(r"\w+")
+
+
+def content_hash(text_content: str, image_url: str | None = None) -> str:
+    """
+    Identity of a chunk: the same body text (and image) always hashes the same.
+    The page title and section header are left out, so boilerplate repeated on
+    pages with different titles still hashes alike.
+    """
+    digest = hashlib.sha256(chunk_body(text_content).encode("utf-8"))
+    if image_url:
+        digest.update(b"\0" + image_url.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def simhash(text: str, shingle_size: int = 3) -> int | None:
+    """
+    64-bit SimHash of a text over word shingles. Texts that differ in a few
+    words get fingerprints that differ in a few bits. Returns None for texts
+    too short to fingerprint reliably.
+    """
+    words = WORD_RE.findall(text.lower())
+    if len(words) < MIN_SIMHASH_WORDS:
+        return None
+
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+         for shingle in shingles],
+        dtype=np.uint64,
+    )
+    # One row of 64 bits per shingle; each bit votes +1 or -1
+    bits = np.unpackbits(hashes.byteswap().view(np.uint8).reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "big")
+
+
+class NearDuplicateIndex:
+    """
+    Finds fingerprints within `max_distance` bits of one already added.
+
+    The 64 bits are split into max_distance + 1 bands; by the pigeonhole
+    principle two fingerprints that close agree exactly on at least one band,
+    so only fingerprints sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 6):
+        self.max_distance = max_distance
+        band_count = max_distance + 1
+        self._band_bits = SIMHASH_BITS // band_count
+        self._band_shifts = [i * self._band_bits for i in range(band_count)]
+        self._bands: list[dict[int, list[int]]] = [{} for _ in range(band_count)]
+
+    def _band_keys(self, fingerprint: int) -> list[int]:
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> shift) & mask for shift in self._band_shifts]
+
+    def contains_near(self, fingerprint: int) -> bool:
+        for band, key in zip(self._bands, self._band_keys(fingerprint)):
+            for candidate in band.get(key, ()):
+                if (candidate ^ fingerprint).bit_count() <= self.max_distance:
+                    return True
+        return False
+
+    def add(self, fingerprint: int):
+        for band, key in zip(self._bands, self._band_keys(fingerprint)):
+            band.setdefault(key, []).append(fingerprint)
+
+
+class ChunkDeduplicator:
+    """
+    Decides which chunks of a website are worth embedding. Exact duplicates are
+    detected by content hash against everything the website already stores;
+    near-duplicates, when enabled, by SimHash against chunks accepted so far.
+    """
+
+    def __init__(self, exact: bool = True, near: bool = False, max_distance: int = 6,
+                 stored_hashes: set[str] | None = None):
+        self._hashes: set[str] | None = set(stored_hashes or ()) if exact else None
+        self._near_duplicates = NearDuplicateIndex(max_distance) if near else None
+        # Embeddings saved by deduplication
+        self.exact_skipped = 0
+        self.near_skipped = 0
+
+    def is_duplicate(self, text_content: str, chunk_hash: str) -> bool:
+        """Returns True for a duplicate; otherwise remembers the chunk as stored."""
+        if self._hashes is not None:
+            if chunk_hash in self._hashes:
+                self.exact_skipped += 1
+                return True
+            self._hashes.add(chunk_hash)
+
+        if self._near_duplicates is not None:
+            fingerprint = simhash(chunk_body(text_content))
+            if fingerprint is not None:
+                if self._near_duplicates.contains_near(fingerprint):
+                    self.near_skipped += 1
+                    return True
+                self._near_duplicates.add(fingerprint)
+        return False
+
+    def forget(self, chunk_hashes: list[str]):
+        """Called for deleted chunks, so another page may store them again."""
+        if self._hashes is not None:
+            self._hashes.difference_update(chunk_hashes)
+
+    def remember(self, chunk_hashes: set[str]):
+        if self._hashes is not None:
+            self._hashes.update(chunk_hashes)
@@ -0,0 +1,85 @@
+from collections import Counter
+import re
+
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+from app.services.chunking import Block, HeadingPath
+
+# A PDF block set at least this much larger than the body text, and no longer than
+# PDF_HEADING_MAX_WORDS, is read as a heading
+PDF_HEADING_SIZE_RATIO = 1.15
+PDF_HEADING_MAX_WORDS = 15
+DOCX_HEADING_STYLE_RE = re.compile(r"Heading ([1-9])")
+
+
+def pdf_blocks(pdf_document) -> tuple[str, list[Block]]:
+    """
+    Text blocks of a PDF in reading order. PDFs carry no heading markup, so a
+    short block set noticeably larger than the body text is taken as a heading.
+    Sections are labelled with the heading and page they are on, or just the
+    page number before the first heading.
+    """
+    pages = [page.get_text("dict") for page in pdf_document]
+
+    # The body text size is the one most characters are set in
+    size_counts = Counter()
+    for page in pages:
+        for block in page["blocks"]:
+            for line in block.get("lines", ()):
+                for span in line["spans"]:
+                    size_counts[round(span["size"], 1)] += len(span["text"].strip())
+    body_size = size_counts.most_common(1)[0][0] if size_counts else 0.0
+
+    title = (pdf_document.metadata or {}).get("title") or ""
+    heading = None
+    blocks = []
+    for page_number, page in enumerate(pages, start=1):
+        for block in page["blocks"]:
+            lines = block.get("lines")
+            if not lines:  # Image blocks have no lines
+                continue
+            text = " ".join(" ".join(span["text"] for span in line["spans"]) for line in lines)
+            text = " ".join(text.split())
+            if not text:
+                continue
+            size = max(span["size"] for line in lines for span in line["spans"])
+            if size >= body_size * PDF_HEADING_SIZE_RATIO and len(text.split()) <= PDF_HEADING_MAX_WORDS:
+                heading = text
+                title = title or text
+                continue
+            section = f"{heading} (page {page_number})" if heading else f"Page {page_number}"
+            blocks.append(Block(text, (section,)))
+    return title, blocks
+
+
+def docx_blocks(document) -> tuple[str, list[Block]]:
+    """Paragraphs and table rows of a Word document in order, under the Heading 1-9 styles above them."""
+    title = document.core_properties.title or ""
+    path = HeadingPath()
+    blocks = []
+    for element in document.element.body.iterchildren():
+        if element.tag == qn("w:p"):
+            paragraph = Paragraph(element, document)
+            text = paragraph.text.strip()
+            if not text:
+                continue
+            style = paragraph.style.name if paragraph.style is not None else ""
+            heading = DOCX_HEADING_STYLE_RE.fullmatch(style)
+            if style == "Title":
+                title = title or text
+            elif heading:
+                path.enter(int(heading.group(1)), text)
+            else:
+                blocks.append(Block(text, path.headings))
+        elif element.tag == qn("w:tbl"):
+            for row in Table(element, document).rows:
+                cells = []
+                for cell in row.cells:
+                    # Merged cells are returned once per grid column they span
+                    if cell.text.strip() and (not cells or cells[-1] != cell.text.strip()):
+                        cells.append(cell.text.strip())
+                if cells:
+                    blocks.append(Block(" | ".join(cells), path.headings))
+    return title, blocks
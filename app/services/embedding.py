@@ -0,0 +1,207 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional
+import asyncio
+import os
+import sys
+import threading
+
+import numpy as np
+from cachetools import TTLCache
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    # sentence-transformers pulls in torch and transformers, seconds of import time and
+    # hundreds of MB; it is only imported when the model is actually loaded
+    from sentence_transformers import SentenceTransformer
+
+MODEL_PATH = "./embedding_model/all-MiniLM-L6-v2"
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+_embedding_model: "SentenceTransformer | None" = None
+_embedding_model_lock = threading.Lock()
+
+
+def get_embedding_model() -> "SentenceTransformer":
+    """
+    Returns the process-wide embedding model, loading it on first use (and
+    downloading it on the very first run). The API loads it during startup
+    warm-up, in a thread, so importing this module stays cheap.
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        # Encoding threads may ask for the model at the same time; only one loads it
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                _embedding_model = _load_embedding_model()
+    return _embedding_model
+
+
+def _load_embedding_model() -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+
+    if os.path.isdir(MODEL_PATH):
+        model = SentenceTransformer(MODEL_PATH)
+        print("Model loaded from local path.")
+        return model
+    print(f"Downloading model '{MODEL_NAME}'...")
+    model = SentenceTransformer(MODEL_NAME)
+    print(f"Saving model to '{MODEL_PATH}'...")
+    model.save(MODEL_PATH)
+    return model
+
+
+def get_embeddings(texts: List[str], batch_size: int = 64) -> List[Optional[List[float]]]:
+    """
+    Generates vector embeddings for a list of texts with a single encode() call,
+    so the model can vectorize the forward pass over whole batches.
+    The result is aligned with the input; empty or invalid texts map to None.
+    """
+    valid_positions = [i for i, text in enumerate(texts) if text and isinstance(text, str) and text.strip()]
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    if not valid_positions:
+        return embeddings
+
+    vectors = get_embedding_model().encode(
+        [texts[i].strip() for i in valid_positions],
+        batch_size=batch_size,
+        show_progress_bar=False,
+    )
+    for position, vector in zip(valid_positions, vectors):
+        embeddings[position] = vector.tolist()
+    return embeddings
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU/TTL cache for query-side embeddings, keyed by model name and
+    normalized query text. Vectors are stored as float32 arrays, and the total
+    size of the cache is capped in bytes.
+    Only the chat path uses it; scraped chunks are always encoded fresh.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, model_name: str = MODEL_NAME):
+        self.model_name = model_name
+        self._cache = TTLCache(maxsize=max_bytes, ttl=ttl_seconds, getsizeof=self._sizeof)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _sizeof(vector: np.ndarray) -> int:
+        return vector.nbytes + sys.getsizeof(vector)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lower-cases and collapses whitespace. The MiniLM tokenizer is uncased, so this doesn't change the vector."""
+        return " ".join(text.lower().split())
+
+    def get(self, normalized_text: str) -> Optional[List[float]]:
+        vector = self._cache.get((self.model_name, normalized_text))
+        if vector is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return vector.tolist()
+
+    def put(self, normalized_text: str, embedding: List[float]):
+        self._cache[(self.model_name, normalized_text)] = np.asarray(embedding, dtype=np.float32)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._cache),
+            "bytes": self._cache.currsize,
+            "max_bytes": self._cache.maxsize,
+        }
+
+
+class QueryEmbedder:
+    """
+    Embeds chat queries off the event loop.
+
+    Queries that arrive within a short window are micro-batched into a single
+    encode() call, which runs on a dedicated thread pool. The forward pass
+    releases the GIL, so the event loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(self, max_workers: int, batch_window_ms: float, max_batch_size: int,
+                 cache: QueryEmbeddingCache | None = None):
+        self.cache = cache
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query-embedding")
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Returns the embedding for one query, batched together with concurrent callers."""
+        if not text or not isinstance(text, str) or not text.strip():
+            return None
+
+        if self.cache is not None:
+            text = self.cache.normalize(text)
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+
+        embedding = await self._embed_batched(text)
+        if embedding is not None and self.cache is not None:
+            self.cache.put(text, embedding)
+        return embedding
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _embed_batched(self, text: str) -> Optional[List[float]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush, loop)
+
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        texts = [text for text, _ in batch]
+        encoding = loop.run_in_executor(self._executor, get_embeddings, texts, self.max_batch_size)
+
+        def resolve(done: asyncio.Future):
+            error = done.exception()
+            for position, (_, future) in enumerate(batch):
+                # A caller may have been cancelled (e.g. client disconnected)
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[position])
+
+        encoding.add_done_callback(resolve)
+
+
+@lru_cache
+def get_query_embedder() -> QueryEmbedder:
+    """Returns the process-wide query embedder."""
+    settings = get_settings()
+    return QueryEmbedder(
+        max_workers=settings.EMBEDDING_QUERY_WORKERS,
+        batch_window_ms=settings.EMBEDDING_QUERY_BATCH_WINDOW_MS,
+        max_batch_size=settings.EMBEDDING_QUERY_MAX_BATCH,
+        cache=QueryEmbeddingCache(
+            max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        ) if settings.EMBEDDING_CACHE_MAX_BYTES > 0 else None,
+    )
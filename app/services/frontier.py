@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import posixpath
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a visitor came from and never change the page
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "igshid", "ref", "ref_src", "spm",
+}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str, keep_query: bool = False) -> str | None:
+    """
+    Returns the canonical form of a URL, or None for non-HTTP(S) links.
+
+    Scheme and host are lower-cased, default ports, fragments, dot segments,
+    duplicate and trailing slashes are removed. With keep_query the query string
+    is kept minus tracking parameters and in sorted order; otherwise it is dropped
+    entirely, as the crawler always did.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    path = posixpath.normpath(path) if path != "/" else path
+    # normpath keeps a leading '//' and turns an empty result into '.'
+    path = "/" + path.lstrip("/") if path != "." else "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = ""
+    if keep_query and parts.query:
+        params = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+        ]
+        query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@dataclass
+class FrontierEntry:
+    url: str
+    depth: int
+    # Hint from the source of the URL, e.g. a sitemap <priority>; higher is more important
+    priority: float = 0.0
+    from_sitemap: bool = False
+    lastmod: datetime | None = None
+
+
+# A priority function maps an entry to a sort key; smaller keys are crawled first
+PriorityFunction = Callable[[FrontierEntry], tuple]
+
+PRIORITY_STRATEGIES: dict[str, PriorityFunction] = {
+    # Discovery order, the crawler's original behaviour
+    "fifo": lambda entry: (),
+    # Breadth-first by link depth
+    "shallow_first": lambda entry: (entry.depth,),
+    # Sitemap URLs first (highest <priority>, then most recent <lastmod> first), then discovered links by depth
+    "sitemap_first": lambda entry: (
+        0 if entry.from_sitemap else 1,
+        -entry.priority,
+        -entry.lastmod.timestamp() if entry.lastmod else 0.0,
+        entry.depth,
+    ),
+}
+
+
+class CrawlFrontier:
+    """
+    URLs waiting to be crawled, ordered by a pluggable priority function.
+
+    Every URL is canonicalized before it is admitted, and a seen-set makes
+    the duplicate check O(1), so a URL is queued at most once per crawl.
+    Push and pop are O(log n) heap operations.
+    """
+
+    def __init__(
+            self,
+            allowed_host: str,
+            strategy: str | PriorityFunction = "shallow_first",
+            max_depth: int | None = None,
+            keep_query: bool = False,
+            url_filter: Callable[[str], bool] | None = None,
+    ):
+        self.allowed_host = allowed_host
+        self.max_depth = max_depth
+        self.keep_query = keep_query
+        # Extra admission check on the canonical URL, e.g. robots.txt rules
+        self.url_filter = url_filter
+        self._priority = PRIORITY_STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+        self._heap: list[tuple] = []
+        self._seen: set[str] = set()
+        # Tie-breaker that keeps discovery order among equal priorities
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def seen(self) -> set[str]:
+        """Every URL admitted so far, whether already crawled or still queued."""
+        return self._seen
+
+    def push(self, url: str, depth: int, priority: float = 0.0, from_sitemap: bool = False,
+             lastmod: datetime | None = None) -> bool:
+        """Queues a URL unless it is off-site, filtered out, too deep or already seen. Returns True if it was added."""
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+
+        normalized_url = normalize_url(url, keep_query=self.keep_query)
+        if normalized_url is None or normalized_url in self._seen:
+            return False
+        if urlsplit(normalized_url).netloc != self.allowed_host:
+            return False
+
+        if self.url_filter is not None and not self.url_filter(normalized_url):
+            return False
+        self._seen.add(normalized_url)
+
+        entry = FrontierEntry(url=normalized_url, depth=depth, priority=priority,
+                              from_sitemap=from_sitemap, lastmod=lastmod)
+        heapq.heappush(self._heap, (self._priority(entry), next(self._counter), entry))
+        return True
+
+    def pop(self) -> FrontierEntry | None:
+        if not self._heap:
+            return None
+        return heapq.heappop(self._heap)[-1]
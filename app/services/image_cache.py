@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+from cachetools import LRUCache, TTLCache
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from app.core.config import get_settings
+
+
+class ImageCache:
+    """
+    Images of image chunks, ready to be put into a multimodal chat prompt.
+
+    Every image is downloaded once, downscaled to `max_dimension` and
+    re-encoded (WebP by default), then stored on disk under the SHA-256 of the
+    stored bytes, so the same picture found at several URLs is kept once. A
+    small index file per URL points at that blob. The scraper fills the cache
+    while it crawls, so chat turns normally only read from disk, and the
+    decoded images of recent turns stay in memory.
+
+    Downloads share one keep-alive requests.Session and run on a thread pool,
+    so the images of a turn are fetched concurrently. URLs that failed are
+    not retried for `failure_ttl` seconds.
+    """
+
+    def __init__(self, directory: Path, max_dimension: int, image_format: str, quality: int,
+                 memory_max_images: int, fetch_timeout: float, fetch_max_bytes: int, fetch_workers: int,
+                 failure_ttl: float, max_age: float):
+        self.directory = directory
+        self.max_dimension = max_dimension
+        self.image_format = image_format.upper()
+        self.quality = quality
+        self.fetch_timeout = fetch_timeout
+        self.fetch_max_bytes = fetch_max_bytes
+        self.max_age = max_age
+        self._memory: LRUCache = LRUCache(maxsize=memory_max_images)
+        self._failures: TTLCache = TTLCache(maxsize=10_000, ttl=failure_ttl)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="image-fetch")
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=fetch_workers, pool_maxsize=fetch_workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    async def load_many(self, urls: list[str]) -> dict[str, Image.Image | None]:
+        """Decoded images by URL, loaded concurrently; None for images that could not be loaded."""
+        unique = list(dict.fromkeys(urls))
+        images = await asyncio.gather(*(self.load(url) for url in unique))
+        return dict(zip(unique, images))
+
+    async def load(self, url: str) -> Image.Image | None:
+        image = self._memory.get(url)
+        if image is not None:
+            return image
+        if url in self._failures:
+            return None
+
+        # Concurrent turns that need the same image share one load
+        future = self._inflight.get(url)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, self._load_sync, url)
+            self._inflight[url] = future
+            future.add_done_callback(lambda _: self._inflight.pop(url, None))
+        try:
+            image = await asyncio.shield(future)
+        except Exception as e:
+            print(f"  [!] Could not load image from {url}: {e}")
+            self._failures[url] = True
+            return None
+        self._memory[url] = image
+        return image
+
+    async def prefetch(self, urls: list[str]):
+        """
+        Downloads and stores the images that aren't on disk yet, or are older
+        than `max_age`, without decoding them. Used by the scraper; failures are only logged.
+        """
+        loop = asyncio.get_running_loop()
+        stale = [url for url in dict.fromkeys(urls) if not self._is_fresh(url)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, self._fetch_and_store, url) for url in stale),
+            return_exceptions=True)
+        for url, result in zip(stale, results):
+            if isinstance(result, Exception):
+                print(f"  [!] Could not prefetch image {url}: {result}")
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+
+    def _load_sync(self, url: str) -> Image.Image:
+        data = self._read(url)
+        if data is None:
+            data = self._fetch_and_store(url)
+        image = Image.open(io.BytesIO(data))
+        # Decode now, in the worker thread, rather than lazily on the event loop
+        image.load()
+        return image
+
+    def _fetch_and_store(self, url: str) -> bytes:
+        data = self._downscale(self._download(url))
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            self._write_atomic(blob_path, data)
+        self._write_atomic(self._index_path(url), digest.encode("ascii"))
+        return data
+
+    def _download(self, url: str) -> bytes:
+        with self._session.get(url, stream=True, timeout=self.fetch_timeout) as response:
+            response.raise_for_status()
+            buffer = io.BytesIO()
+            for block in response.iter_content(64 * 1024):
+                buffer.write(block)
+                if buffer.tell() > self.fetch_max_bytes:
+                    raise ValueError(f"image is larger than {self.fetch_max_bytes} bytes")
+        return buffer.getvalue()
+
+    def _downscale(self, data: bytes) -> bytes:
+        with Image.open(io.BytesIO(data)) as image:
+            # Only the first frame of an animated image is kept
+            image.thumbnail((self.max_dimension, self.max_dimension))
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            if self.image_format == "JPEG" or not has_alpha:
+                image = image.convert("RGB")
+            else:
+                image = image.convert("RGBA")
+            output = io.BytesIO()
+            image.save(output, format=self.image_format, quality=self.quality)
+        return output.getvalue()
+
+    def _read(self, url: str) -> bytes | None:
+        try:
+            digest = self._index_path(url).read_text(encoding="ascii").strip()
+            return self._blob_path(digest).read_bytes()
+        except (OSError, ValueError):
+            return None
+
+    def _is_fresh(self, url: str) -> bool:
+        try:
+            return time.time() - self._index_path(url).stat().st_mtime < self.max_age
+        except OSError:
+            return False
+
+    def _index_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / "urls" / key[:2] / key
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest[:2] / f"{digest}.{self.image_format.lower()}"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        """Writes through a temporary file, so a concurrent reader (API or worker) never sees half a file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+
+
+@lru_cache
+def get_image_cache() -> ImageCache:
+    settings = get_settings()
+    return ImageCache(
+        Path(settings.IMAGE_CACHE_DIR),
+        max_dimension=settings.IMAGE_MAX_DIMENSION,
+        image_format=settings.IMAGE_CACHE_FORMAT,
+        quality=settings.IMAGE_CACHE_QUALITY,
+        memory_max_images=settings.IMAGE_CACHE_MEMORY_ITEMS,
+        fetch_timeout=settings.IMAGE_FETCH_TIMEOUT_SECONDS,
+        fetch_max_bytes=settings.IMAGE_FETCH_MAX_BYTES,
+        fetch_workers=settings.IMAGE_FETCH_WORKERS,
+        failure_ttl=settings.IMAGE_FETCH_FAILURE_TTL_SECONDS,
+        max_age=settings.IMAGE_CACHE_MAX_AGE_SECONDS,
+    )
@@ -0,0 +1,261 @@
+import hashlib
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.crawledpage import CrawledPage
+from app.models.scrapedcontent import ScrapedContent
+from app.services.chunk_writer import ScrapedContentWriter
+from app.services.dedup import ChunkDeduplicator, content_hash
+from app.services.embedding import get_embeddings
+from app.services.frontier import normalize_url
+
+
+def page_hash(chunks: list) -> str:
+    """
+    Identity of a page's extracted content, over the full text of its chunks in
+    order. Unlike content_hash it includes the title and section headers, so a
+    renamed page counts as changed.
+    """
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            text_content, image_url = chunk, None
+        else:
+            text_content, image_url = chunk.get("text_content") or "", chunk.get("image_url")
+        digest.update(hashlib.sha256(f"{text_content}\0{image_url or ''}".encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+class ChunkIngestor:
+    """
+    Embedding stage of the scraping pipeline.
+
+    Chunks from many pages are collected into a bounded buffer. Once the buffer
+    is full, the whole batch is encoded by the model (EMBEDDING_BATCH_SIZE
+    texts per forward pass), written to the scraped_content table with one
+    binary COPY and committed.
+    Call flush() (or use the ingestor as a context manager) to write whatever
+    is left in the buffer at the end of a crawl.
+
+    For re-crawls, replace_page() diffs a page's chunks against the stored ones
+    by content hash, so only new or changed chunks are embedded. Page validators
+    recorded with record_page() are written in the same transaction as the chunks.
+
+    Boilerplate repeated across pages is stored once per website (see
+    ChunkDeduplicator); the first page a chunk was found on keeps it.
+    """
+
+    def __init__(self, db: Session, website_id: int, batch_size: int | None = None,
+                 keep_query_params: bool = False):
+        settings = get_settings()
+        self.db = db
+        self.website_id = website_id
+        self.keep_query_params = keep_query_params
+        self.batch_size = batch_size or settings.INGESTION_WRITE_BATCH_SIZE
+        self.embedding_batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.writer = ScrapedContentWriter(db, use_copy=settings.INGESTION_USE_COPY)
+        self._pending: list[dict] = []
+        self._pending_pages: dict[str, dict] = {}
+        self.chunks_embedded = 0
+        self.chunks_unchanged = 0
+        self.chunks_deleted = 0
+        self.dedup = ChunkDeduplicator(
+            exact=settings.DEDUP_EXACT_ENABLED,
+            near=settings.DEDUP_NEAR_DUPLICATES_ENABLED,
+            max_distance=settings.DEDUP_SIMHASH_MAX_DISTANCE,
+            stored_hashes=self._load_hashes() if settings.DEDUP_EXACT_ENABLED else None,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, chunks: list, source_url: str):
+        """
+        Queues text chunks (plain strings) or image chunks
+        (dicts with 'text_content' and 'image_url') from one page.
+        """
+        for row in self._rows(chunks, source_url):
+            self._queue(row)
+
+    def _rows(self, chunks: list, source_url: str) -> list[dict]:
+        """Turns a page's chunks into scraped_content rows (without embeddings), skipping empty ones."""
+        rows = []
+        for chunk in chunks:
+            # This handles both text strings and image dictionaries
+            if isinstance(chunk, str):
+                text_content, image_url = chunk, None
+            else:
+                text_content, image_url = chunk.get("text_content"), chunk.get("image_url")
+
+            if text_content:
+                rows.append({
+                    "website_id": self.website_id,
+                    "source_url": source_url,
+                    "text_content": text_content,
+                    "image_url": image_url,
+                    "content_hash": content_hash(text_content, image_url),
+                })
+        return rows
+
+    def replace_page(self, chunks: list, source_url: str):
+        """
+        Makes the stored chunks of one page match `chunks`: chunks whose hash and
+        text are still present are kept with their embedding, the rest are
+        deleted, and only the new chunks are queued for embedding. The text is
+        compared too because the hash leaves out the title and section header.
+        """
+        rows = self._rows(chunks, source_url)
+        stored = self.db.execute(
+            select(ScrapedContent.id, ScrapedContent.content_hash, ScrapedContent.text_content)
+            .filter(ScrapedContent.website_id == self.website_id, ScrapedContent.source_url == source_url)
+        ).all()
+
+        new_chunks = {(row["content_hash"], row["text_content"]) for row in rows}
+        kept_chunks: set[tuple[str, str]] = set()
+        stale_ids = []
+        for chunk_id, chunk_hash, text_content in stored:
+            # Rows from before content hashing have no hash and are always replaced
+            if (chunk_hash, text_content) in new_chunks and (chunk_hash, text_content) not in kept_chunks:
+                kept_chunks.add((chunk_hash, text_content))
+            else:
+                stale_ids.append(chunk_id)
+        kept = {chunk_hash for chunk_hash, _ in kept_chunks}
+
+        if stale_ids:
+            self._delete_chunks(ScrapedContent.id.in_(stale_ids))
+            # Extra copies of a kept chunk may have been among the deleted rows
+            self.dedup.remember(kept)
+
+        queued: set[str] = set()
+        for row in rows:
+            if (row["content_hash"], row["text_content"]) in kept_chunks:
+                self.chunks_unchanged += 1
+            elif row["content_hash"] not in queued:
+                queued.add(row["content_hash"])
+                self._queue(row)
+
+    def record_page(self, url: str, etag: str | None, last_modified: str | None,
+                    content_hash: str | None, links: list[str]):
+        """Buffers the validators of a crawled page; written by the next flush()."""
+        url = self.page_key(url)
+        self._pending_pages[url] = {
+            "website_id": self.website_id,
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "links": links,
+        }
+
+    def remove_pages(self, urls: list[str]):
+        """Deletes the chunks and crawl state of pages that no longer exist."""
+        if not urls:
+            return
+        normalized_urls = {self.page_key(url) for url in urls}
+        for url in normalized_urls:
+            self._pending_pages.pop(url, None)
+
+        # Chunks are stored under the URL the page was fetched from, which may not be normalized
+        source_urls = [
+            source_url for (source_url,) in self.db.execute(
+                select(ScrapedContent.source_url).distinct()
+                .filter(ScrapedContent.website_id == self.website_id)
+            ).all()
+            if source_url and self.page_key(source_url) in normalized_urls
+        ]
+        if source_urls:
+            self._delete_chunks(ScrapedContent.website_id == self.website_id, ScrapedContent.source_url.in_(source_urls))
+        self.db.execute(
+            delete(CrawledPage)
+            .where(CrawledPage.website_id == self.website_id, CrawledPage.url.in_(normalized_urls))
+        )
+        self.db.commit()
+
+    def stored_pages(self) -> dict[str, CrawledPage]:
+        """The crawl state recorded for this website, keyed by normalized URL."""
+        pages = self.db.execute(
+            select(CrawledPage).filter(CrawledPage.website_id == self.website_id)
+        ).scalars().all()
+        return {page.url: page for page in pages}
+
+    def stored_page_urls(self) -> set[str]:
+        """Normalized URLs of every page this website has chunks or crawl state for."""
+        urls = {
+            self.page_key(source_url) for (source_url,) in self.db.execute(
+                select(ScrapedContent.source_url).distinct()
+                .filter(ScrapedContent.website_id == self.website_id, ScrapedContent.source_url.is_not(None))
+            ).all()
+        }
+        urls.update(
+            url for (url,) in self.db.execute(
+                select(CrawledPage.url).filter(CrawledPage.website_id == self.website_id)
+            ).all()
+        )
+        return urls
+
+    def page_key(self, url: str) -> str:
+        """The normalized URL a page's crawl state is stored under, matching the crawl frontier's."""
+        return normalize_url(url, keep_query=self.keep_query_params) or url
+
+    def _load_hashes(self) -> set[str]:
+        return {
+            chunk_hash for (chunk_hash,) in self.db.execute(
+                select(ScrapedContent.content_hash)
+                .filter(ScrapedContent.website_id == self.website_id, ScrapedContent.content_hash.is_not(None))
+            ).all()
+        }
+
+    def _delete_chunks(self, *criteria):
+        deleted_hashes = self.db.execute(
+            delete(ScrapedContent).where(*criteria).returning(ScrapedContent.content_hash)
+        ).scalars().all()
+        self.chunks_deleted += len(deleted_hashes)
+        self.dedup.forget(deleted_hashes)
+
+    def _queue(self, row: dict):
+        if self.dedup.is_duplicate(row["text_content"], row["content_hash"]):
+            return
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Encodes all buffered chunks and bulk-inserts them, along with any recorded pages, in one transaction."""
+        rows, self._pending = self._pending, []
+        pages, self._pending_pages = list(self._pending_pages.values()), {}
+        if not rows and not pages:
+            return
+
+        to_insert = []
+        if rows:
+            embeddings = get_embeddings([row["text_content"] for row in rows], batch_size=self.embedding_batch_size)
+            for row, embedding in zip(rows, embeddings):
+                if embedding:
+                    row["embedding"] = embedding
+                    to_insert.append(row)
+
+        if to_insert:
+            self.writer.write(to_insert)
+            self.chunks_embedded += len(to_insert)
+
+        if pages:
+            statement = pg_insert(CrawledPage).values(pages)
+            self.db.execute(statement.on_conflict_do_update(
+                constraint='uq_crawled_pages_website_url',
+                set_={
+                    "etag": statement.excluded.etag,
+                    "last_modified": statement.excluded.last_modified,
+                    "content_hash": statement.excluded.content_hash,
+                    "links": statement.excluded.links,
+                    "last_crawled_at": func.now(),
+                },
+            ))
+
+        self.db.commit()
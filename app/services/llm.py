@@ -0,0 +1,61 @@
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator
+
+from app.core.config import get_settings
+
+
+class LLMClient:
+    """
+    Non-blocking wrapper around a Gemini GenerativeModel.
+
+    All calls go through the SDK's async API, so a slow generation only
+    suspends its own request instead of blocking the event loop. A semaphore
+    caps how many calls are in flight per worker, and every call is bounded
+    by a timeout.
+    """
+
+    def __init__(self, model, max_concurrency: int, timeout: float):
+        self.model = model
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def generate(self, prompt) -> str:
+        """Returns the full response text. Raises on API errors and asyncio.TimeoutError."""
+        async with self._semaphore:
+            response = await asyncio.wait_for(self.model.generate_content_async(prompt), timeout=self.timeout)
+        return response.text
+
+    async def stream(self, prompt) -> AsyncIterator[str]:
+        """
+        Yields response text chunks as the model produces them. Starting the
+        stream and waiting for each chunk hold a concurrency slot and are
+        bounded by the timeout; handing a chunk to the consumer is not, so a
+        slow client neither keeps a slot nor trips the timeout.
+        """
+        async with self._semaphore:
+            response = await asyncio.wait_for(self.model.generate_content_async(prompt, stream=True),
+                                              timeout=self.timeout)
+        chunks = aiter(response)
+        while True:
+            async with self._semaphore:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), timeout=self.timeout)
+                except StopAsyncIteration:
+                    return
+            if chunk.text:
+                yield chunk.text
+
+@lru_cache
+def get_llm_client() -> LLMClient:
+    """Returns the process-wide LLM client, so the concurrency limit applies to the whole worker."""
+    # The Gemini SDK (grpc, protobuf) is imported on first use, not when the web app is imported
+    import google.generativeai as genai
+
+    settings = get_settings()
+    genai.configure(api_key=settings.GOOGLE_API_KEY)
+    return LLMClient(
+        genai.GenerativeModel(settings.LLM_MODEL_NAME),
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from app.services.chunking import Block, HeadingPath, get_chunker
+
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+# Elements whose whole text is one paragraph-level block
+BLOCK_TAGS = {"p", "li", "pre", "blockquote", "dt", "dd", "figcaption", "caption", "address"}
+# Elements whose text flows into the surrounding block
+INLINE_TAGS = {"a", "abbr", "b", "br", "cite", "code", "em", "i", "label", "mark", "q", "s", "small",
+               "span", "strong", "sub", "sup", "time", "u"}
+# Never content: scripts, navigation and page furniture
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "nav", "footer", "aside",
+                "form", "button", "select", "input"}
+# Blocks made only of link text shorter than this ("Details", "Read more") are dropped
+MIN_LINK_BLOCK_WORDS = 4
+
+
+@dataclass
+class PageAnalysis:
+    """Everything the scraper needs from one HTML page."""
+    chunks: list[str] = field(default_factory=list)
+    image_chunks: list[dict] = field(default_factory=list)
+    links: list[str] = field(default_factory=list)
+
+
+def analyze_html(page_html: str, source_url: str) -> PageAnalysis:
+    """
+    Parses the page once and derives text chunks, image chunks and outbound
+    links from the same tree, instead of building a new tree for each of them.
+    """
+    soup = BeautifulSoup(page_html, 'lxml')
+    return PageAnalysis(
+        chunks=chunk_page(soup),
+        image_chunks=extract_image_chunks(soup, source_url),
+        links=extract_links(soup, source_url),
+    )
+
+
+def extract_image_chunks(soup: BeautifulSoup, source_url: str) -> list[dict]:
+    image_chunks = []
+    # Find all images that have an 'alt' tag, as this is our descriptive text
+    for img_tag in soup.find_all('img', alt=True):
+        alt_text = img_tag['alt'].strip()
+        # Only process images with meaningful descriptions
+        if alt_text and len(alt_text) > 10:
+            img_src = img_tag.get('src')
+            if img_src:
+                # Convert relative URLs (e.g., /img/photo.jpg) to absolute URLs
+                absolute_img_url = urljoin(source_url, img_src)
+                # Create a special chunk for the image
+                image_chunk = {
+                    "text_content": alt_text,  # The alt text is the "content"
+                    "image_url": absolute_img_url
+                }
+                image_chunks.append(image_chunk)
+    return image_chunks
+
+
+def extract_links(soup: BeautifulSoup, source_url: str) -> list[str]:
+    """Absolute URLs of all links on the page; the crawler filters and normalizes them."""
+    return [urljoin(source_url, link_el['href'].strip()) for link_el in soup.find_all("a", href=True)]
+
+
+def chunk_page(soup: BeautifulSoup) -> list[str]:
+    """
+    Chunks an already-parsed page: the main content is split into blocks on
+    headings and paragraphs, which the Chunker packs into token-budgeted chunks.
+    """
+    # Use a more specific main content selector to avoid headers/footers
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', role='main') or soup.body
+    if not main_content:
+        return []
+
+    title, blocks = extract_blocks(main_content)
+    if not title and soup.title and soup.title.string:
+        title = soup.title.string.strip()
+    return get_chunker().chunk(blocks, title)
+
+
+def extract_blocks(root: Tag) -> tuple[str, list[Block]]:
+    """
+    Walks the content tree in document order and returns the page title (the
+    first h1) and the paragraph-level blocks, each tagged with the headings it
+    sits under. Text directly inside containers such as divs becomes a block of
+    its own; link-only snippets like "Read more" are dropped.
+    """
+    title = ""
+    blocks: list[Block] = []
+    path = HeadingPath()
+
+    def walk(element: Tag):
+        nonlocal title
+        inline: list[tuple[str, bool]] = []
+
+        def flush_inline():
+            text = " ".join(" ".join(piece for piece, _ in inline).split())
+            links_only = all(is_link for piece, is_link in inline if piece.strip())
+            if text and not (links_only and len(text.split()) < MIN_LINK_BLOCK_WORDS):
+                blocks.append(Block(text, path.headings))
+            inline.clear()
+
+        for child in element.children:
+            if isinstance(child, NavigableString):
+                if type(child) is NavigableString:  # Not a comment, CDATA or doctype
+                    inline.append((str(child), False))
+                continue
+            if not isinstance(child, Tag) or child.name in SKIPPED_TAGS:
+                continue
+
+            if child.name in INLINE_TAGS:
+                inline.append((child.get_text(" "), child.name == "a"))
+            elif child.name in HEADING_LEVELS:
+                flush_inline()
+                text = child.get_text(" ", strip=True)
+                level = HEADING_LEVELS[child.name]
+                if not text:
+                    continue
+                if level == 1 and not title:
+                    title = text
+                    path.clear()
+                else:
+                    path.enter(level, text)
+            elif child.name == "tr":
+                flush_inline()
+                cells = [cell.get_text(" ", strip=True) for cell in child.find_all(["th", "td"], recursive=False)]
+                text = " | ".join(cell for cell in cells if cell)
+                if text:
+                    blocks.append(Block(text, path.headings))
+            elif child.name in BLOCK_TAGS:
+                flush_inline()
+                text = child.get_text(" ", strip=True)
+                if text:
+                    blocks.append(Block(text, path.headings))
+            else:
+                flush_inline()
+                walk(child)
+        flush_inline()
+
+    walk(root)
+    return title, blocks
@@ -0,0 +1,149 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from cachetools import LRUCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.crud.crud_scrapedcontent import crud_scraped_content
+from app.models.website import ScrapingStatus, Website
+
+
+@dataclass(frozen=True)
+class RetrievedChunk:
+    """A scraped chunk returned by the in-memory backend (mirrors the ScrapedContent columns used in chat)."""
+    id: int
+    text_content: str
+    source_url: str | None
+    image_url: str | None
+
+
+@dataclass
+class WebsiteIndex:
+    """All embeddings of one website as a single contiguous, L2-normalized float32 matrix."""
+    version: datetime | None
+    matrix: np.ndarray
+    chunks: List[RetrievedChunk]
+
+
+class RetrievalBackend:
+    """Interface for finding the top-k chunks of a website closest to a query embedding."""
+
+    async def search(self, db: AsyncSession, website: Website, embedding: List[float], top_k: int) -> list:
+        raise NotImplementedError
+
+    def invalidate(self, website_id: int):
+        """Drops any cached state for a website. No-op for stateless backends."""
+
+
+class PgVectorRetrievalBackend(RetrievalBackend):
+    """Runs the similarity search in Postgres through the pgvector index."""
+
+    async def search(self, db: AsyncSession, website: Website, embedding: List[float], top_k: int) -> list:
+        return await crud_scraped_content.get_relevant_scraped_content(
+            db, website_id=website.id, embedding=embedding, top_k=top_k)
+
+
+class InMemoryRetrievalBackend(RetrievalBackend):
+    """
+    Keeps one embedding matrix per website in process memory and answers top-k
+    with a single matrix-vector product plus argpartition.
+
+    The all-MiniLM-L6-v2 embeddings are unit length, so ranking by cosine
+    similarity gives the same order as the L2 distance used by pgvector.
+
+    A matrix is tagged with the website's last_scraped_at and rebuilt as soon as
+    a newer scrape has finished. This works across processes, since the scraper
+    runs outside the API worker. While a website is still being scraped, its
+    content keeps changing, so those searches go to pgvector instead.
+    """
+
+    def __init__(self, max_websites: int):
+        self._indexes: LRUCache = LRUCache(maxsize=max_websites)
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._fallback = PgVectorRetrievalBackend()
+
+    def invalidate(self, website_id: int):
+        self._indexes.pop(website_id, None)
+
+    async def search(self, db: AsyncSession, website: Website, embedding: List[float], top_k: int) -> list:
+        if website.scraping_status != ScrapingStatus.COMPLETED:
+            self.invalidate(website.id)
+            return await self._fallback.search(db, website, embedding, top_k)
+
+        index = await self._get_index(db, website)
+        if not index.chunks:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = index.matrix @ query
+        k = min(top_k, len(index.chunks))
+        # argpartition finds the k best in O(n); only those k get sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [index.chunks[i] for i in top]
+
+    async def _get_index(self, db: AsyncSession, website: Website) -> WebsiteIndex:
+        index = self._indexes.get(website.id)
+        if index is not None and index.version == website.last_scraped_at:
+            return index
+
+        # Only one request per website rebuilds the matrix, the others wait for it
+        lock = self._locks.setdefault(website.id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(website.id)
+            if index is None or index.version != website.last_scraped_at:
+                index = await self._build_index(db, website)
+                self._indexes[website.id] = index
+        return index
+
+    async def _build_index(self, db: AsyncSession, website: Website) -> WebsiteIndex:
+        rows = await crud_scraped_content.get_embedded_by_website(db, website_id=website.id)
+        chunks = [
+            RetrievedChunk(id=row.id, text_content=row.text_content,
+                           source_url=row.source_url, image_url=row.image_url)
+            for row in rows
+        ]
+        if rows:
+            matrix = np.ascontiguousarray(np.vstack([row.embedding for row in rows]), dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        return WebsiteIndex(version=website.last_scraped_at, matrix=matrix, chunks=chunks)
+
+
+def fuse_rankings(rankings: list[list], top_k: int, k: int = 60) -> list:
+    """
+    Reciprocal rank fusion of several top-k result lists: a chunk scores
+    1 / (k + rank) in every list it appears in. Chunks are matched by id, and
+    ties go to the earlier list.
+    """
+    scores: dict[int, float] = {}
+    chunks: dict[int, object] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            scores[chunk.id] = scores.get(chunk.id, 0.0) + 1 / (k + rank)
+            chunks.setdefault(chunk.id, chunk)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [chunks[chunk_id] for chunk_id in best]
+
+
+@lru_cache
+def get_retrieval_backend() -> RetrievalBackend:
+    """Returns the process-wide retrieval backend selected by RETRIEVAL_BACKEND."""
+    settings = get_settings()
+    if settings.RETRIEVAL_BACKEND == "memory":
+        return InMemoryRetrievalBackend(max_websites=settings.RETRIEVAL_MEMORY_MAX_WEBSITES)
+    if settings.RETRIEVAL_BACKEND == "pgvector":
+        return PgVectorRetrievalBackend()
+    raise ValueError(f"Unknown RETRIEVAL_BACKEND '{settings.RETRIEVAL_BACKEND}', expected 'pgvector' or 'memory'")
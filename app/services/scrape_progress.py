@@ -0,0 +1,163 @@
+"""
+Live scrape progress for the dashboard, carried over Postgres LISTEN/NOTIFY.
+
+Scraper workers publish small JSON events on the scrape_progress channel.
+Each API process keeps one LISTEN connection and fans the events out to the
+dashboard's Server-Sent Event streams, so the browser sees a crawl advance
+without re-fetching /api-keys.
+"""
+import asyncio
+import json
+from functools import lru_cache
+from typing import AsyncIterator, Callable
+
+import asyncpg
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.sse import sse_event
+from app.db.base import DB_URL
+from app.db.session import sync_engine
+
+CHANNEL = "scrape_progress"
+# NOTIFY payloads are limited to 8000 bytes; error messages are cut well below that
+MAX_ERROR_LENGTH = 500
+
+
+def publish_scrape_event(website_id: int, event: str, **data):
+    """
+    Sends one event ('status', 'progress' or 'failed') to every listening API process.
+    Progress reporting must never fail a scrape, so errors are only logged.
+    """
+    if isinstance(data.get("error"), str):
+        data["error"] = data["error"][:MAX_ERROR_LENGTH]
+    payload = json.dumps({"website_id": website_id, "event": event, **data})
+    try:
+        # Its own connection, so the event goes out now rather than when the crawl's transaction commits
+        with sync_engine.connect() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                               {"channel": CHANNEL, "payload": payload})
+            connection.commit()
+    except Exception as e:
+        print(f"  [!] Could not publish scrape progress: {e}")
+
+
+class ProgressReporter:
+    """
+    Publishes a crawl's counters as 'progress' events, at most once every
+    `interval` seconds and only when they changed, however fast pages arrive.
+    """
+
+    def __init__(self, website_id: int, snapshot: Callable[[], dict], interval: float):
+        self.website_id = website_id
+        self.snapshot = snapshot
+        self.interval = interval
+        self._last: dict | None = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.publish()
+
+    async def publish(self):
+        counters = self.snapshot()
+        if counters != self._last:
+            self._last = counters
+            await asyncio.to_thread(publish_scrape_event, self.website_id, "progress", **counters)
+
+
+class ScrapeProgressBroadcaster:
+    """
+    Fans scrape events out to the dashboard streams of one API process.
+
+    A single asyncpg connection LISTENs on the channel, opened with the first
+    subscriber and reopened if the database drops it. Every subscriber gets a
+    bounded queue of the events for its own websites; a client that can't keep
+    up loses its oldest events, which is harmless as each progress event is a
+    full snapshot of the counters.
+    """
+
+    def __init__(self, dsn: str, queue_size: int = 100, reconnect_delay: float = 5.0):
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._listener: asyncio.Task | None = None
+
+    def subscribe(self, website_ids: set[int]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for website_id in website_ids:
+            self._subscribers.setdefault(website_id, set()).add(queue)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        for website_id in list(self._subscribers):
+            queues = self._subscribers[website_id]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[website_id]
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self):
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                await lost.wait()
+                print("  [!] Scrape progress listener lost its connection, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"  [!] Scrape progress listener failed: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        for queue in self._subscribers.get(event.get("website_id"), ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+async def stream_scrape_events(website_ids: set[int], keepalive_seconds: float | None = None) -> AsyncIterator[str]:
+    """
+    Yields the scrape events of `website_ids` as SSE, with comment lines in
+    between so proxies don't close an idle stream. Runs until the client disconnects.
+    """
+    keepalive_seconds = keepalive_seconds or get_settings().SSE_KEEPALIVE_SECONDS
+    broadcaster = get_progress_broadcaster()
+    queue = broadcaster.subscribe(website_ids)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            # The event dict is shared with the other subscribers of the website
+            yield sse_event(event["event"], {key: value for key, value in event.items() if key != "event"})
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+@lru_cache
+def get_progress_broadcaster() -> ScrapeProgressBroadcaster:
+    # asyncpg takes a plain postgresql:// DSN, without SQLAlchemy's driver suffix
+    return ScrapeProgressBroadcaster(DB_URL.replace("postgresql+asyncpg://", "postgresql://", 1))
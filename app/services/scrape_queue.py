@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+
+from app.crud.crud_scrape_job import ACTIVE_STATUSES
+from app.models.scrapejob import ScrapeJob, ScrapeJobStatus
+from app.models.website import ScrapingStatus, Website
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    website_id: int
+    url: str
+    incremental: bool
+    attempts: int
+
+
+class ScrapeJobQueue:
+    """
+    Postgres-backed queue of scrape jobs, used by the scraper workers.
+
+    Each method runs in its own short transaction on the synchronous engine.
+    Claiming uses FOR UPDATE SKIP LOCKED, so any number of workers can poll
+    the same table without handing out a job twice or waiting on each other.
+    """
+
+    def __init__(self, db: Session, worker_id: str, max_attempts: int, retry_backoff_seconds: float):
+        self.db = db
+        self.worker_id = worker_id
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+    def claim(self) -> ClaimedJob | None:
+        """Marks the next due job as running under this worker and returns it."""
+        next_job = (
+            select(ScrapeJob.id)
+            .where(ScrapeJob.status == ScrapeJobStatus.QUEUED, ScrapeJob.run_after <= func.now())
+            .order_by(ScrapeJob.run_after, ScrapeJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        row = self.db.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == next_job)
+            .values(
+                status=ScrapeJobStatus.RUNNING,
+                attempts=ScrapeJob.attempts + 1,
+                locked_by=self.worker_id,
+                heartbeat_at=func.now(),
+            )
+            .returning(ScrapeJob.id, ScrapeJob.website_id, ScrapeJob.incremental, ScrapeJob.attempts)
+        ).first()
+        self.db.commit()
+        if row is None:
+            return None
+
+        url = self.db.execute(select(Website.url).where(Website.id == row.website_id)).scalar_one_or_none()
+        if url is None:
+            # The website was deleted after the job was queued
+            self.fail(row.id, self.max_attempts, "Website no longer exists")
+            return self.claim()
+        return ClaimedJob(id=row.id, website_id=row.website_id, url=url,
+                          incremental=row.incremental, attempts=row.attempts)
+
+    def heartbeat(self, job_id: int):
+        self.db.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == job_id, ScrapeJob.locked_by == self.worker_id)
+            .values(heartbeat_at=func.now())
+        )
+        self.db.commit()
+
+    def succeed(self, job_id: int):
+        self.db.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == job_id)
+            .values(status=ScrapeJobStatus.SUCCEEDED, locked_by=None, finished_at=func.now(), last_error=None)
+        )
+        self.db.commit()
+
+    def fail(self, job_id: int, attempts: int, error: str) -> bool:
+        """
+        Puts a failed job back in the queue with exponential backoff, or gives up after max_attempts.
+        Returns True when the job will be retried.
+        """
+        retry = attempts < self.max_attempts
+        if retry:
+            delay = timedelta(seconds=self.retry_backoff_seconds * 2 ** (attempts - 1))
+            values = {
+                "status": ScrapeJobStatus.QUEUED,
+                "run_after": datetime.now(timezone.utc) + delay,
+                # Pages stored before the failure are kept, so the retry only picks up what is missing
+                "incremental": True,
+            }
+        else:
+            values = {"status": ScrapeJobStatus.FAILED, "finished_at": func.now()}
+        website_ids = self.db.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == job_id)
+            .values(locked_by=None, last_error=error, **values)
+            .returning(ScrapeJob.website_id)
+        ).scalars().all()
+        if not retry:
+            self._give_up(website_ids)
+        self.db.commit()
+        return retry
+
+    def release(self, job_id: int):
+        """Returns a job this worker is giving up on (e.g. at shutdown) without counting the attempt."""
+        self.db.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == job_id, ScrapeJob.locked_by == self.worker_id)
+            .values(status=ScrapeJobStatus.QUEUED, locked_by=None, attempts=ScrapeJob.attempts - 1,
+                    incremental=True)
+        )
+        self.db.commit()
+
+    def requeue_stale(self, stale_after_seconds: float) -> int:
+        """
+        Puts running jobs whose worker stopped sending heartbeats back in the
+        queue, or fails them once they are out of attempts. Returns the number requeued.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after_seconds)
+        is_stale = (ScrapeJob.status == ScrapeJobStatus.RUNNING, ScrapeJob.heartbeat_at < cutoff)
+        exhausted = self.db.execute(
+            update(ScrapeJob)
+            .where(*is_stale, ScrapeJob.attempts >= self.max_attempts)
+            .values(status=ScrapeJobStatus.FAILED, locked_by=None, finished_at=func.now(),
+                    last_error="Worker stopped responding")
+            .returning(ScrapeJob.website_id)
+        ).scalars().all()
+        if exhausted:
+            self._give_up(exhausted)
+        stale = self.db.execute(
+            update(ScrapeJob)
+            .where(*is_stale)
+            .values(status=ScrapeJobStatus.QUEUED, locked_by=None, incremental=True,
+                    last_error="Worker stopped responding")
+            .returning(ScrapeJob.id)
+        ).scalars().all()
+        self.db.commit()
+        return len(stale)
+
+    def _give_up(self, website_ids: list[int]):
+        """
+        Leaves the websites of jobs that ran out of attempts refreshable again.
+        last_scraped_at is not touched: they keep whatever their last complete
+        scrape stored, and caches keyed on it stay valid.
+        """
+        if website_ids:
+            self.db.execute(
+                update(Website)
+                .where(Website.id.in_(website_ids),
+                       Website.scraping_status.in_((ScrapingStatus.PENDING, ScrapingStatus.SCRAPING)))
+                .values(scraping_status=ScrapingStatus.COMPLETED)
+            )
+
+    def queue_orphaned_websites(self) -> int:
+        """
+        Queues a job for every website left PENDING or SCRAPING without one, e.g.
+        by a crash before this queue existed. Returns the number of jobs created.
+        """
+        orphaned = self.db.execute(
+            select(Website.id)
+            .where(Website.scraping_status.in_((ScrapingStatus.PENDING, ScrapingStatus.SCRAPING)))
+            .where(~select(ScrapeJob.id)
+                   .where(ScrapeJob.website_id == Website.id, ScrapeJob.status.in_(ACTIVE_STATUSES))
+                   .exists())
+        ).scalars().all()
+        for website_id in orphaned:
+            self.db.add(ScrapeJob(website_id=website_id, incremental=True, status=ScrapeJobStatus.QUEUED))
+        self.db.commit()
+        return len(orphaned)
@@ -1,345 +1,254 @@
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import time
-from sentence_transformers import SentenceTransformer
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
-import os
-import csv
-import fitz  # PyMuPDF
-import docx  # python-docx
+import asyncio
 import io
-import requests
+import os
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 
-from app.crud.crud_scrapedcontent import crud_scraped_content
-from app.crud.crud_website import crud_website
-from app.db.session import AsyncSessionLocal
-from app.models.scrapedcontent import ScrapedContent
-from app.models.website import ScrapingStatus, Website
-from app.schemas.scrapedcontent import ScrapedContentCreate
-from app.schemas.website import WebsiteUpdate
+import docx  # python-docx
+import fitz  # PyMuPDF
+from playwright.async_api import Browser
+from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.db.session import SyncSessionLocal
+from app.models.website import ScrapingStatus, Website
+from app.services.chunking import get_chunker
+from app.services.crawler import Crawler, FetchedDocument
+from app.services.document_blocks import docx_blocks, pdf_blocks
+from app.services.image_cache import get_image_cache
+from app.services.ingestion import ChunkIngestor, page_hash
+from app.services.page_analysis import analyze_html
+from app.services.scrape_progress import ProgressReporter, publish_scrape_event
 
-CSV_FILENAME = "scraped_data_log.csv"
-CSV_HEADERS = ['website_id', 'source_url', 'text_content', 'embedding_preview']
-
-MODEL_PATH = "./embedding_model/all-MiniLM-L6-v2"
-MODEL_NAME = 'all-MiniLM-L6-v2'
-if os.path.isdir(MODEL_PATH):
-    embedding_model = SentenceTransformer(MODEL_PATH)
-    print("Model loaded from local path.")
-else:
-    print(f"Downloading model '{MODEL_NAME}'...")
-    embedding_model = SentenceTransformer(MODEL_NAME)
-    print(f"Saving model to '{MODEL_PATH}'...")
-    embedding_model.save(MODEL_PATH)
-
-def get_embedding(text: str):
-    """Generates a vector embedding for a given piece of text."""
-    if not text or not isinstance(text, str):
-        return None
-    # The .tolist() converts the numpy array to a standard Python list
-    return embedding_model.encode(text.strip()).tolist()
 
-'''
-async def add_chunk_to_db_and_csv(
-        db: AsyncSession,
-        chunks_to_add: list,
-        website_id: int,
-        source_url: str
-):
+def extract_document(document: FetchedDocument) -> tuple[list, list[str]]:
     """
-    Adds a list of text chunks to the database and logs them to a CSV.
-    This is now a batch operation for efficiency.
+    Turns a fetched document into chunks (text strings and image dicts)
+    and the absolute URLs of the links it contains.
     """
-    if not chunks_to_add:
-        return
+    if 'application/pdf' in document.content_type:
+        # Link extraction from PDFs is not feasible here
+        return handle_pdf(document.body, document.url), []
 
-    # Batch add to database
-    for text_chunk in chunks_to_add:
-        embedding = get_embedding(text_chunk)
-        if embedding:
-            await crud_scraped_content.create(db,obj_in= ScrapedContentCreate(website_id = website_id,source_url = source_url, text_content = text_chunk, embedding=embedding))
+    if 'word' in document.content_type:  # Catches .doc, .docx
+        # Link extraction from Word docs is not feasible
+        return handle_docx(document.body, document.url), []
 
-    # Batch write to CSV
-    #file_exists = os.path.exists(CSV_FILENAME)
-    #with open(CSV_FILENAME, 'a', newline='', encoding='utf-8') as csvfile:
-    #    writer = csv.writer(csvfile)
-    #    if not file_exists:
-    #        writer.writerow(CSV_HEADERS)
+    # One parse of the page yields text chunks, image chunks and links
+    analysis = analyze_html(document.html, document.url)
+    print(f"  > Found {len(analysis.image_chunks)} relevant images.")
 
-    #    for text_chunk in chunks_to_add:
-    #        embedding_preview = "omitted"
-    #        writer.writerow([website_id, source_url, text_chunk, embedding_preview])
-'''
+    return analysis.chunks + analysis.image_chunks, analysis.links
 
 
-def add_chunk_to_db_and_csv(
-        db: Session,  # The 'db' object is now a synchronous SQLAlchemy Session
-        chunks_to_add: list,
-        website_id: int,
-        source_url: str
-):
-    """
-    Adds a list of text chunks to the database using direct, synchronous
-    SQLAlchemy operations and logs them to a CSV.
+async def crawl_site(url: str, website_id: int, db: Session, incremental: bool = False,
+                     browser: Browser | None = None):
     """
-    if not chunks_to_add:
-        return
-
-    # --- Database Logic ---
-    # This loop now performs synchronous operations
-    for chunk in chunks_to_add:
-        # This handles both text strings and image dictionaries
-        text_content = chunk if isinstance(chunk, str) else chunk.get("text_content")
+    Crawls a website concurrently and feeds every extracted chunk into the embedding stage.
 
-        if text_content:
-            embedding = get_embedding(text_content)
-            if embedding:
-                # 1. Create an instance of the SQLAlchemy model directly
-                new_content = ScrapedContent(
-                    website_id=website_id,
-                    source_url=source_url,
-                    text_content=text_content,
-                    embedding=embedding
-                )
-                # 2. Add the new object to the session.
-                # The actual commit will happen later in the main scrape_site function.
-                db.add(new_content)
-    db.commit()
-
-def process_page_content(page_html: str, source_url: str) -> list[str]:
+    With `incremental`, the validators stored by the previous crawl make every
+    request conditional: unchanged pages (304) are not rendered at all, pages
+    whose extracted text hashes the same are not re-embedded, and changed pages
+    only embed the chunks that are new. Pages that answer 404/410, or that are
+    no longer reachable once the whole site has been crawled, are deleted.
     """
-    Processes HTML using a refined and correctly-ordered list of strategies
-    to handle multiple modern website layouts.
+    settings = get_settings()
+    ingestor = ChunkIngestor(db, website_id, keep_query_params=settings.SCRAPER_KEEP_QUERY_PARAMS)
+    # The ingestor and its DB session are used by one thread at a time
+    ingest_lock = asyncio.Lock()
+    # Crawl state recorded by the previous scrape, keyed by normalized URL
+    known_pages = ingestor.stored_pages() if incremental else {}
+    visited: set[str] = set()
+    pages_unchanged = 0
+    # Images of image chunks are downloaded into the image cache alongside the crawl
+    image_cache = get_image_cache() if settings.IMAGE_PREFETCH_ENABLED else None
+    image_prefetches: set[asyncio.Task] = set()
+
+    def conditional_headers(page_url: str) -> dict[str, str]:
+        headers = {}
+        known = known_pages.get(ingestor.page_key(page_url))
+        if known is not None:
+            if known.etag:
+                headers['If-None-Match'] = known.etag
+            if known.last_modified:
+                headers['If-Modified-Since'] = known.last_modified
+        return headers
+
+    def store_page(document: FetchedDocument, chunks: list, links: list[str]):
+        nonlocal pages_unchanged
+        digest = page_hash(chunks)
+        known = known_pages.get(ingestor.page_key(document.url))
+        if not incremental:
+            # Chunks are buffered across pages and embedded in batches
+            ingestor.add(chunks, document.url)
+        elif known is not None and known.content_hash == digest:
+            print("  > Content unchanged, keeping stored chunks.")
+            pages_unchanged += 1
+        else:
+            ingestor.replace_page(chunks, document.url)
+        ingestor.record_page(document.url, document.etag, document.last_modified, digest, links)
+
+    async def handle_document(document: FetchedDocument) -> list[str]:
+        visited.add(ingestor.page_key(document.url))
+        if document.not_modified:
+            print("  > Not modified since the last crawl.")
+            known = known_pages.get(ingestor.page_key(document.url))
+            return list(known.links) if known is not None else []
+
+        if document.gone:
+            print(f"  > Page is gone ({document.status}), removing its chunks.")
+            async with ingest_lock:
+                await asyncio.to_thread(ingestor.remove_pages, [document.url])
+            return []
+
+        # Parsing and embedding are CPU-bound, so they run off the event loop
+        chunks, links = await asyncio.to_thread(extract_document, document)
+        print(f"  > Generated {len(chunks)} semantic chunks.")
+        image_urls = [chunk["image_url"] for chunk in chunks if isinstance(chunk, dict) and chunk.get("image_url")]
+        if image_cache is not None and image_urls:
+            prefetch = asyncio.create_task(image_cache.prefetch(image_urls))
+            image_prefetches.add(prefetch)
+            prefetch.add_done_callback(image_prefetches.discard)
+        async with ingest_lock:
+            try:
+                await asyncio.to_thread(store_page, document, chunks, links)
+            except Exception:
+                db.rollback()  # Rollback on error for this page
+                raise
+        return links
+
+    crawler = Crawler(
+        start_url=url,
+        handle_document=handle_document,
+        max_pages=settings.SCRAPER_MAX_PAGES,
+        concurrency=settings.SCRAPER_CONCURRENCY,
+        politeness_delay=settings.SCRAPER_POLITENESS_DELAY_SECONDS,
+        page_timeout_ms=settings.SCRAPER_PAGE_TIMEOUT_MS,
+        wait_until=settings.SCRAPER_WAIT_UNTIL,
+        max_document_bytes=settings.SCRAPER_MAX_DOCUMENT_BYTES,
+        frontier_strategy=settings.SCRAPER_FRONTIER_STRATEGY,
+        max_depth=settings.SCRAPER_MAX_DEPTH,
+        keep_query_params=settings.SCRAPER_KEEP_QUERY_PARAMS,
+        respect_robots=settings.SCRAPER_RESPECT_ROBOTS,
+        use_sitemaps=settings.SCRAPER_USE_SITEMAPS,
+        sitemap_max_urls=settings.SCRAPER_SITEMAP_MAX_URLS,
+        max_crawl_delay=settings.SCRAPER_MAX_CRAWL_DELAY_SECONDS,
+        conditional_headers=conditional_headers if incremental else None,
+    )
+
+    def progress() -> dict:
+        return {
+            "pages_visited": crawler.stats.pages_visited,
+            "pages_failed": crawler.stats.pages_failed,
+            "pages_queued": len(crawler.frontier),
+            "chunks_embedded": ingestor.chunks_embedded,
+            "error": crawler.stats.last_error,
+        }
+
+    reporter = ProgressReporter(website_id, progress, settings.SCRAPE_PROGRESS_INTERVAL_SECONDS)
+    reporting = asyncio.create_task(reporter.run())
+    try:
+        stats = await crawler.run(browser)
+        await asyncio.gather(*image_prefetches)
+    finally:
+        reporting.cancel()
+        for prefetch in image_prefetches:
+            prefetch.cancel()
+
+    async with ingest_lock:
+        # Embed and store whatever is still buffered from the last pages
+        await asyncio.to_thread(ingestor.flush)
+
+        # Only a crawl that reached every page can tell which ones disappeared
+        if incremental and stats.frontier_exhausted:
+            reachable = visited | crawler.frontier.seen
+            stale = [page_url for page_url in await asyncio.to_thread(ingestor.stored_page_urls)
+                     if page_url not in reachable]
+            if stale:
+                print(f"Removing {len(stale)} pages that are no longer linked")
+                await asyncio.to_thread(ingestor.remove_pages, stale)
+
+    print("\n--- Scraping Finished ---")
+    print(f"Total chunks embedded: {ingestor.chunks_embedded}")
+    print(f"Embeddings saved by dedup: {ingestor.dedup.exact_skipped} exact, "
+          f"{ingestor.dedup.near_skipped} near-duplicate chunks skipped")
+    if incremental:
+        print(f"Unchanged: {stats.pages_not_modified} pages not modified, {pages_unchanged} with identical content, "
+              f"{ingestor.chunks_unchanged} chunks kept; {ingestor.chunks_deleted} chunks deleted")
+    print(f"Total pages visited: {stats.pages_visited} ({stats.pages_failed} failed) in {stats.elapsed_seconds:.1f}s, "
+          f"{stats.bytes_downloaded / 1024:.0f} KiB downloaded")
+    await reporter.publish()
+
+
+async def scrape_site(url: str, website_id: int, incremental: bool = False, browser: Browser | None = None):
+    """
+    Runs one scrape of a website and keeps its scraping_status up to date.
+    Called by the scraper worker, which passes in its long-lived browser.
+    Only a scrape that finished sets COMPLETED and stamps last_scraped_at. If
+    it fails or is cancelled, the website goes back to PENDING, as the worker
+    retries the job or returns it to the queue, and the error is re-raised.
+    Status changes and errors are published to the dashboard as they happen.
     """
-    soup = BeautifulSoup(page_html, 'lxml')
-    chunks = []
-
-    # Use a more specific main content selector to avoid headers/footers
-    main_content = soup.find('main') or soup.find('article') or soup.find('div', role='main') or soup.body
-    if not main_content:
-        return []
-
-    page_title_el = main_content.find('h1')
-    page_title = page_title_el.get_text(strip=True) if page_title_el else ""
-
-    # --- STRATEGY 1: Find Specific, High-Quality Repeating Containers (for lists/grids) ---
-    print(f"  > Trying Strategy 1: Specific Container Detection...")
-    # This selector list is now more comprehensive
-    candidate_selectors = [
-        'div.quote', 'div.card', 'div.product-card', 'div.item',
-        'article.post', 'article.blog-post', 'li.list-item'
-    ]
-    for selector in candidate_selectors:
-        items = main_content.select(selector)
-        if len(items) > 2: # Found a promising pattern
-            print(f"  > Success! Detected {len(items)} items using selector '{selector}'.")
-            for item in items:
-                text = item.get_text(separator="\n", strip=True)
-                if text and len(text.split()) > 5:
-                    chunks.append(f"Page Title: {page_title}\n\n{text}")
-            return chunks # Return immediately on success
-
-    # --- STRATEGY 2: Section-Based Chunking ---
-    print(f"  > Strategy 1 Failed. Trying Strategy 2: Section-based Chunking...")
-    sections = main_content.find_all('section', recursive=False) # Find top-level sections
-    if len(sections) > 1:
-        for section in sections:
-            # We look for sections that have a heading AND significant text content
-            heading = section.find(['h2', 'h3'])
-            text = section.get_text(separator="\n", strip=True)
-            if heading and len(text.split()) > 20:
-                chunks.append(f"Page Title: {page_title}\nSection: {heading.get_text(strip=True)}\n\n{text}")
-        if chunks:
-            print(f"  > Success! Found {len(chunks)} chunks using Section Strategy.")
-            return chunks
-
-    # --- STRATEGY 3: ID-Based Chunking ---
-    print(f"  > Strategy 2 Failed. Trying Strategy 3: ID-based Chunking...")
-    # Find all divs that have an ID attribute, as they often mark distinct sections
-    divs_with_id = main_content.find_all('div', id=True, recursive=False)
-    if len(divs_with_id) > 1:
-        for div in divs_with_id:
-            text = div.get_text(separator="\n", strip=True)
-            if len(text.split()) > 30: # Ensure the section has enough content
-                chunks.append(f"Page Title: {page_title}\nSection ID: #{div['id']}\n\n{text}")
-        if chunks:
-            print(f"  > Success! Found {len(chunks)} chunks using ID-based Strategy.")
-            return chunks
-
-    # --- STRATEGY 4: Catch-All Fallback ---
-    print(f"  > Strategy 3 Failed. Trying Strategy 4: Full Content Fallback...")
-    full_text = main_content.get_text(separator="\n", strip=True)
-    if full_text and len(full_text.split()) > 30:
-        print(f"  > Success! Found a single content chunk using Full Content Fallback.")
-        # We can try to create smaller chunks from the full text as a final refinement
-        sub_chunks = full_text.split('\n\n') # Split by double newlines
-        for sub_chunk in sub_chunks:
-            if len(sub_chunk.split()) > 20:
-                 chunks.append(f"Page Title: {page_title}\n\n{sub_chunk.strip()}")
-        if chunks:
-             return chunks
-
-    print("  > All strategies failed to find meaningful chunks.")
-    return []
-
-def scrape_site(url: str, website_id: int):
-    ######################################
-    # Change the limit of pages visited to your liking, it is set to low number for testing
-    max_pages_to_visit = 10
-    #######################################
-    start_url = url
-    base_domain = urlparse(start_url).netloc
     db = SyncSessionLocal()
-    website = db.query(Website).filter(Website.id == website_id).first()
-    if not website:
-        return
     try:
-        website.scraping_status = ScrapingStatus.SCRAPING
-        db.commit()
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36"
-            )
-            page = context.new_page()
-
-            urls_to_visit_queue = [start_url]
-            visited_urls = set()
-
-            while urls_to_visit_queue and len(visited_urls) < max_pages_to_visit:
-                current_url = urls_to_visit_queue.pop(0)
-                if current_url in visited_urls:
-                    continue
-
-                print(f"\nVisiting: {current_url}")
-                visited_urls.add(current_url)
-
-                chunks = []
-                new_links = []
-
-                try:
-                    with requests.get(current_url, stream=True, timeout=15, headers={'User-Agent': '...'}) as r:
-                        content_type = r.headers.get('content-type', '').lower()
-
-                        if 'application/pdf' in content_type:
-                            chunks = handle_pdf(r.content, current_url)
-                            # Link extraction from PDFs is not feasible here
-
-                        elif 'word' in content_type:  # Catches .doc, .docx
-                            chunks = handle_docx(r.content, current_url)
-                            # Link extraction from Word docs is not feasible
-
-                        elif 'text/html' in content_type:
-                            # It's HTML, so now we use Playwright to render it
-                            page.goto(current_url, timeout=30000, wait_until="networkidle")
-                            page_html = page.content()
-                            chunks = handle_html(page_html, current_url)
-
-                            soup = BeautifulSoup(page_html, 'lxml')
-                            image_chunks = []
-                            # Find all images that have an 'alt' tag, as this is our descriptive text
-                            for img_tag in soup.find_all('img', alt=True):
-                                alt_text = img_tag['alt'].strip()
-                                # Only process images with meaningful descriptions
-                                if alt_text and len(alt_text) > 10:
-                                    img_src = img_tag.get('src')
-                                    if img_src:
-                                        # Convert relative URLs (e.g., /img/photo.jpg) to absolute URLs
-                                        absolute_img_url = urljoin(current_url, img_src)
-                                        # Create a special chunk for the image
-                                        image_chunk = {
-                                            "text_content": alt_text,  # The alt text is the "content"
-                                            "image_url": absolute_img_url
-                                        }
-                                        image_chunks.append(image_chunk)
-
-                            print(f"  > Found {len(image_chunks)} relevant images.")
-                            if image_chunks:
-                                # You'll need a slightly modified add function, or update the existing one
-                                add_chunk_to_db_and_csv(db, image_chunks, website_id, current_url)
-
-                            # 4. Find new links to visit
-                            soup = BeautifulSoup(page_html, 'lxml')
-                            for link_el in soup.find_all("a", href=True):
-                                href = link_el['href']
-                                absolute_url = urljoin(current_url, href.strip())
-                                parsed_url = urlparse(absolute_url)
-                                normalized_url = parsed_url._replace(fragment="", query="").geturl()
-
-                                if (urlparse(normalized_url).netloc == base_domain and
-                                        normalized_url not in visited_urls and
-                                        normalized_url not in urls_to_visit_queue):
-                                    urls_to_visit_queue.append(normalized_url)
-
-                    print(f"  > Generated {len(chunks)} semantic chunks.")
-                    if chunks:
-                        add_chunk_to_db_and_csv(db, chunks, website_id, current_url)
-
-                    # Add new links to the queue
-                    if new_links:
-                        urls_to_visit_queue.extend(new_links)
-
-                except PlaywrightTimeoutError:
-                    print(f"  [!] Timeout visiting {current_url}")
-                except Exception as e:
-                    print(f"  [!] Error processing {current_url}: {e}")
-                    db.rollback()  # Rollback on error for this page
-
-                time.sleep(0.5)
-
-            print("\n--- Scraping Finished ---")
-            print(f"Total pages visited: {len(visited_urls)}")
-            browser.close()
+        if not await asyncio.to_thread(_set_scraping_status, db, website_id, ScrapingStatus.SCRAPING):
+            return
+        await asyncio.to_thread(publish_scrape_event, website_id, "status",
+                                status=ScrapingStatus.SCRAPING.value, incremental=incremental)
+        await crawl_site(url, website_id, db, incremental=incremental, browser=browser)
+    except BaseException as e:
+        if isinstance(e, Exception):
+            await asyncio.to_thread(publish_scrape_event, website_id, "failed", error=f"{type(e).__name__}: {e}")
+        if await asyncio.to_thread(_set_scraping_status, db, website_id, ScrapingStatus.PENDING):
+            await asyncio.to_thread(publish_scrape_event, website_id, "status",
+                                    status=ScrapingStatus.PENDING.value, incremental=incremental)
+        raise
+    else:
+        if await asyncio.to_thread(_set_scraping_status, db, website_id, ScrapingStatus.COMPLETED):
+            await asyncio.to_thread(publish_scrape_event, website_id, "status",
+                                    status=ScrapingStatus.COMPLETED.value, incremental=incremental)
     finally:
-        website = db.query(Website).filter(Website.id == website_id).first()
-        if website:
-            website.scraping_status = ScrapingStatus.COMPLETED
-            db.commit()
         db.close()
 
 
+def _set_scraping_status(db: Session, website_id: int, status: ScrapingStatus) -> bool:
+    db.rollback()  # Discard whatever a failed crawl left in the session
+    website = db.query(Website).filter(Website.id == website_id).first()
+    if not website:
+        return False
+    website.scraping_status = status
+    if status == ScrapingStatus.COMPLETED:
+        website.last_scraped_at = datetime.now(timezone.utc)
+    db.commit()
+    return True
+
+
 def handle_pdf(response_content: bytes, source_url: str) -> list:
-    """Extracts text from a PDF's byte content."""
-    chunks = []
+    """Extracts text from a PDF's byte content and chunks it by heading and page."""
     try:
         # Open the PDF from the byte stream
         pdf_document = fitz.open(stream=response_content, filetype="pdf")
         print(f"  > Processing PDF with {len(pdf_document)} pages.")
-        full_text = ""
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            full_text += page.get_text() + "\n"
-
-        # You can add more advanced chunking here, but for now, we'll treat the whole doc as one chunk
-        if full_text.strip():
-            chunks.append(full_text.strip())
+        title, blocks = pdf_blocks(pdf_document)
+        return get_chunker().chunk(blocks, title or _document_name(source_url))
     except Exception as e:
         print(f"  [!] Failed to process PDF from {source_url}: {e}")
-    return chunks
+        return []
 
 
 def handle_docx(response_content: bytes, source_url: str) -> list:
-    """Extracts text from a DOCX file's byte content."""
-    chunks = []
+    """Extracts text from a DOCX file's byte content and chunks it by heading."""
     try:
         # The python-docx library needs a file-like object, so we use io.BytesIO
         document = docx.Document(io.BytesIO(response_content))
         print(f"  > Processing DOCX document.")
-        full_text = "\n".join([para.text for para in document.paragraphs if para.text])
-
-        if full_text.strip():
-            chunks.append(full_text.strip())
+        title, blocks = docx_blocks(document)
+        return get_chunker().chunk(blocks, title or _document_name(source_url))
     except Exception as e:
         print(f"  [!] Failed to process DOCX from {source_url}: {e}")
-    return chunks
+        return []
 
 
-def handle_html(page_html: str, source_url: str) -> list:
-    """Your existing function to process HTML content."""
-    # This is just your process_page_content function, renamed for clarity
-    print(f"  > Processing HTML page...")
-    return process_page_content(page_html, source_url)  # Your existing strategies go here
\ No newline at end of file
+def _document_name(source_url: str) -> str:
+    """Fallback title for documents without one: the file name from the URL."""
+    return os.path.basename(urlparse(source_url).path) or source_url
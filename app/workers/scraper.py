@@ -0,0 +1,183 @@
+"""
+Long-lived scraper worker. Takes jobs from the scrape_jobs table and crawls them.
+
+The embedding model is loaded once when the worker starts, and one
+headless Chromium is shared by every crawl the worker runs. Any number of
+workers can run side by side, on one machine or several.
+
+Usage (from the repository root):
+    python -m app.workers.scraper --concurrency 2
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import time
+import traceback
+
+from playwright.async_api import async_playwright, Browser, Playwright
+
+from app.core.config import get_settings
+from app.db.session import SyncSessionLocal
+from app.models.website import ScrapingStatus
+from app.services.embedding import get_embedding_model
+from app.services.scrape_progress import publish_scrape_event
+from app.services.scrape_queue import ClaimedJob, ScrapeJobQueue
+from app.services.scraping import scrape_site
+
+
+class ScraperWorker:
+    """
+    Runs up to `concurrency` scrape jobs at a time.
+
+    Queue operations are short synchronous transactions, run in a thread one
+    at a time. While a job runs its heartbeat is refreshed; on startup, and
+    then periodically, jobs of workers that stopped responding are put back
+    in the queue. SIGINT/SIGTERM stop the worker and hand its running jobs
+    back to the queue without counting the attempt.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float, heartbeat_interval: float,
+                 stale_after: float, max_attempts: int, retry_backoff: float):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.queue = ScrapeJobQueue(SyncSessionLocal(), self.worker_id, max_attempts, retry_backoff)
+
+        self._queue_lock = asyncio.Lock()
+        self._browser_lock = asyncio.Lock()
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        print(f"Scraper worker {self.worker_id} starting with {self.concurrency} slots")
+        # Load (or download) the model before taking jobs, rather than inside the first crawl
+        await asyncio.to_thread(get_embedding_model)
+        requeued = await self._queue_call(self.queue.requeue_stale, self.stale_after)
+        orphaned = await self._queue_call(self.queue.queue_orphaned_websites)
+        if requeued or orphaned:
+            print(f"Recovered {requeued} interrupted jobs and queued {orphaned} unscraped websites")
+
+        async with async_playwright() as playwright:
+            self._playwright = playwright
+            try:
+                await self._loop()
+            finally:
+                for task in self._tasks:
+                    task.cancel()
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+                if self._browser is not None:
+                    await self._browser.close()
+        self.queue.db.close()
+        print(f"Scraper worker {self.worker_id} stopped")
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    async def _loop(self):
+        last_recovery = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                while len(self._tasks) < self.concurrency:
+                    job = await self._queue_call(self.queue.claim)
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._run_job(job))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._job_done)
+
+                if time.monotonic() - last_recovery >= self.stale_after:
+                    await self._queue_call(self.queue.requeue_stale, self.stale_after)
+                    last_recovery = time.monotonic()
+            except Exception as e:
+                # E.g. the database restarting; keep polling rather than dropping running jobs
+                print(f"  [!] Job queue unavailable: {e}")
+
+            # Sleep until the next poll, unless a slot frees up or the worker is stopped
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _job_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._wakeup.set()
+
+    async def _run_job(self, job: ClaimedJob):
+        mode = "incremental" if job.incremental else "full"
+        print(f"Job {job.id}: {mode} scrape of {job.url} (attempt {job.attempts})")
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            browser = await self._get_browser()
+            await scrape_site(job.url, job.website_id, incremental=job.incremental, browser=browser)
+        except asyncio.CancelledError:
+            print(f"Job {job.id}: interrupted, returning it to the queue")
+            await self._queue_call(self.queue.release, job.id)
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            if not await self._queue_call(self.queue.fail, job.id, job.attempts, f"{type(e).__name__}: {e}"):
+                print(f"Job {job.id}: out of attempts, giving up")
+                await asyncio.to_thread(publish_scrape_event, job.website_id, "status",
+                                        status=ScrapingStatus.COMPLETED.value, incremental=job.incremental)
+        else:
+            await self._queue_call(self.queue.succeed, job.id)
+            print(f"Job {job.id}: done")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self._queue_call(self.queue.heartbeat, job_id)
+            except Exception as e:
+                print(f"  [!] Heartbeat for job {job_id} failed: {e}")
+
+    async def _get_browser(self) -> Browser:
+        """The shared Chromium, relaunched if it has crashed."""
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                self._browser = await self._playwright.chromium.launch(headless=True)
+            return self._browser
+
+    async def _queue_call(self, method, *args):
+        async with self._queue_lock:
+            try:
+                return await asyncio.to_thread(method, *args)
+            except Exception:
+                await asyncio.to_thread(self.queue.db.rollback)
+                raise
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=settings.SCRAPE_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    worker = ScraperWorker(
+        concurrency=args.concurrency,
+        poll_interval=settings.SCRAPE_JOB_POLL_INTERVAL_SECONDS,
+        heartbeat_interval=settings.SCRAPE_JOB_HEARTBEAT_SECONDS,
+        stale_after=settings.SCRAPE_JOB_STALE_AFTER_SECONDS,
+        max_attempts=settings.SCRAPE_JOB_MAX_ATTEMPTS,
+        retry_backoff=settings.SCRAPE_JOB_RETRY_BACKOFF_SECONDS,
+    )
+    asyncio.run(worker.run())
+
+
+if __name__ == "__main__":
+    main()
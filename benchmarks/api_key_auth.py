@@ -0,0 +1,55 @@
+"""
+Microbenchmark of API-key authentication throughput, before and after the verified-key cache.
+
+  * bcrypt:  verify_key() on every request, the old hot path (the find_by_prefix
+             query is not included, so the real saving is larger);
+  * cached:  fingerprint_key() plus a VerifiedKeyCache lookup, the path taken
+             by a warm cache hit (the user and website primary-key lookups
+             that follow it are not included either).
+
+Usage (from the repository root):
+    python -m benchmarks.api_key_auth --requests 200
+"""
+import argparse
+import os
+import time
+import uuid
+
+# The settings only need placeholder values here; nothing connects to a database
+for name in ("DB_NAME", "DB_USER", "DB_PASSWORD", "SECRET_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "benchmark")
+
+from app.core.api_key_cache import VerifiedKey, VerifiedKeyCache
+from app.core.security import fingerprint_key, hash_key, verify_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    api_key = "benchmark-api-key-" + uuid.uuid4().hex
+    hashed_key = hash_key(api_key)
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        assert verify_key(api_key, hashed_key)
+    bcrypt_elapsed = time.perf_counter() - start
+
+    cache = VerifiedKeyCache(maxsize=10000, ttl_seconds=60)
+    cache.put(fingerprint_key(api_key), VerifiedKey(
+        key_id=uuid.uuid4(), user_id=uuid.uuid4(), website_id=1, is_active=True))
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        assert cache.get(fingerprint_key(api_key)) is not None
+    cached_elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} authentications")
+    print(f"bcrypt verify : {bcrypt_elapsed * 1000 / args.requests:9.3f} ms/req  ({args.requests / bcrypt_elapsed:12.1f} req/s)")
+    print(f"cache hit     : {cached_elapsed * 1000 / args.requests:9.3f} ms/req  ({args.requests / cached_elapsed:12.1f} req/s)")
+    print(f"Speed-up      : {bcrypt_elapsed / cached_elapsed:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
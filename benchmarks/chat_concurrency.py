@@ -0,0 +1,78 @@
+"""
+Load test for concurrent chat generations with a stubbed LLM.
+
+The stub model sleeps for a fixed latency instead of calling Gemini. The same
+burst of concurrent chats is run twice on one event loop:
+
+  * blocking: the old path, calling the synchronous generate_content()
+    inside the coroutine, so chats queue up one after another;
+  * async:    LLMClient, which awaits generate_content_async(), so chats
+    overlap up to the configured concurrency limit.
+
+Usage (from the repository root):
+    python -m benchmarks.chat_concurrency --chats 20 --latency 0.5 --max-concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.llm import LLMClient
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class SleepingModel:
+    """Stands in for genai.GenerativeModel with a fixed generation latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return StubResponse("stub answer")
+
+    async def generate_content_async(self, prompt, stream: bool = False):
+        await asyncio.sleep(self.latency)
+        return StubResponse("stub answer")
+
+
+async def blocking_chat(model: SleepingModel):
+    return model.generate_content("prompt").text
+
+
+async def async_chat(client: LLMClient):
+    return await client.generate("prompt")
+
+
+async def run_burst(make_chat, chats: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(make_chat() for _ in range(chats)))
+    return time.perf_counter() - start
+
+
+async def main_async(args):
+    model = SleepingModel(args.latency)
+    client = LLMClient(model, max_concurrency=args.max_concurrency, timeout=args.latency * 10)
+
+    blocking = await run_burst(lambda: blocking_chat(model), args.chats)
+    overlapping = await run_burst(lambda: async_chat(client), args.chats)
+
+    print(f"{args.chats} concurrent chats, {args.latency:.2f}s stub LLM latency")
+    print(f"Blocking generate_content : {blocking:6.2f}s wall clock")
+    print(f"LLMClient (async)         : {overlapping:6.2f}s wall clock")
+    print(f"Speed-up                  : {blocking / overlapping:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Counts the embeddings that chunk deduplication saves on a synthetic site.
+
+Every generated page has its own <title> and <h1>, like a real article, plus
+a shared logo, a cookie banner, a "Shipping and returns" section and a
+"related products" card grid drawn from a small catalogue: the kind of
+boilerplate chunking and image-alt extraction repeat on every page. Each chunk carries its page's title, so dedup has to
+look past that header. Stock counts vary per page, which makes those cards
+near- rather than exact duplicates. Pages are chunked with analyze_html and passed through
+ChunkDeduplicator with exact-only and exact plus SimHash settings.
+
+Usage (from the repository root):
+    python -m benchmarks.chunk_dedup --pages 200 --max-distance 6
+"""
+import argparse
+import random
+import time
+
+from app.services.dedup import ChunkDeduplicator, content_hash
+from app.services.page_analysis import analyze_html
+
+WORDS = ("order delivery returns store online team service policy region hours opening "
+         "friendly generous regular fast offers across placed every during").split()
+PRODUCTS = [f"Product {i}" for i in range(12)]
+SHIPPING = ("Orders placed before 2 pm on a working day leave our warehouse the same day. Delivery within the "
+            "region takes one to two working days, and three to five days elsewhere. Every order can be returned "
+            "free of charge within 30 days: print the label from your account, pack the items in their original "
+            "packaging and drop the parcel at any post office. Refunds reach your account within five days.")
+
+
+def make_page(index: int, rng: random.Random) -> str:
+    related = rng.sample(PRODUCTS, 4)
+    cards = "\n".join(
+        f'<div class="card"><h3>{name}</h3><p>{name} is part of our spring collection, made from recycled '
+        f'materials and shipped in plastic-free packaging. In stock: {rng.randint(1, 9)} units.</p></div>'
+        for name in related
+    )
+    body = " ".join(rng.choice(WORDS) for _ in range(60))
+    title = f"Article {index}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}"
+    return f"""<html><head><title>{title} | Acme</title></head><body>
+        <h1>{title}</h1>
+        <img src="/static/logo.png" alt="Acme Corporation company logo">
+        <div class="cookie-banner">We use cookies to improve your experience. By continuing you accept our cookie policy.</div>
+        <p>Article {index}: {body}</p>
+        <section><h2>Shipping and returns</h2><p>{SHIPPING}</p></section>
+        <div class="related">{cards}</div>
+        <img src="/images/article-{index}.jpg" alt="Illustration for article number {index}">
+    </body></html>"""
+
+
+def run(pages: list[tuple[str, str]], deduplicator: ChunkDeduplicator) -> tuple[int, int, float]:
+    total = stored = 0
+    start = time.perf_counter()
+    for url, html in pages:
+        analysis = analyze_html(html, url)
+        for chunk in analysis.chunks + analysis.image_chunks:
+            text, image_url = (chunk, None) if isinstance(chunk, str) else (chunk["text_content"], chunk["image_url"])
+            total += 1
+            if not deduplicator.is_duplicate(text, content_hash(text, image_url)):
+                stored += 1
+    return total, stored, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--max-distance", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = [(f"https://example.com/articles/{i}", make_page(i, rng)) for i in range(args.pages)]
+
+    for label, deduplicator in (
+        ("no dedup", ChunkDeduplicator(exact=False)),
+        ("exact", ChunkDeduplicator(exact=True)),
+        ("exact+simhash", ChunkDeduplicator(exact=True, near=True, max_distance=args.max_distance)),
+    ):
+        total, stored, elapsed = run(pages, deduplicator)
+        print(f"{label:<14}: {total} chunks, {stored} embedded, "
+              f"{deduplicator.exact_skipped} exact + {deduplicator.near_skipped} near duplicates skipped "
+              f"({(total - stored) / total:6.1%} embeddings saved) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
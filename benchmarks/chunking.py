@@ -0,0 +1,268 @@
+"""
+Chunking benchmark: the old layout strategies vs the token-budgeted Chunker.
+
+Runs over the HTML fixtures in benchmarks/fixtures/html and
+benchmarks/fixtures/site, plus the PDF and Word documents in
+benchmarks/fixtures/documents.
+
+The legacy path is the pre-Chunker behaviour:
+- HTML goes through the first of four layout strategies that matches
+  (repeating containers, sections, div ids, or a blank-line split).
+- A PDF or Word file becomes a single chunk.
+The new path splits every format on headings and paragraphs into chunks sized
+for the embedding model's tokenizer.
+
+For each path the benchmark reports:
+- Chunk sizes, and how much text lies past the model's token window, where
+  the embedding would silently drop it.
+- Retrieval quality:
+  - Queries are sentences sampled from the documents, with about a third of
+    their words dropped and the rest shuffled.
+  - Chunks are ranked on what the model would see, i.e. their text cut at the
+    token window.
+  - A query is answered correctly when a top-k chunk contains the whole
+    sentence within that window.
+  - Ranking uses TF-IDF by default, so the benchmark runs without the model.
+    Use --retriever model to rank with the embedding model instead.
+- Chunking throughput.
+
+Usage (from the repository root):
+    python -m benchmarks.chunking --queries 300 --rounds 5
+"""
+import argparse
+import contextlib
+import io
+import math
+import random
+import re
+import time
+
+import docx
+import fitz
+import numpy as np
+from bs4 import BeautifulSoup
+
+from app.services.chunking import SENTENCE_END_RE, get_chunker, get_token_counter
+from app.services.document_blocks import docx_blocks, pdf_blocks
+from app.services.page_analysis import chunk_page
+from benchmarks.fixture_server import FIXTURES_DIR
+
+WORD_RE = re.compile(r"\w+")
+# all-MiniLM-L6-v2 reads 256 tokens, two of which are [CLS] and [SEP]
+MODEL_WINDOW_TOKENS = 254
+
+
+def load_corpus() -> list[tuple[str, str, bytes]]:
+    """(name, kind, content) of every fixture document."""
+    corpus = []
+    for directory in ("html", "site"):
+        for path in sorted((FIXTURES_DIR / directory).glob("*.html")):
+            corpus.append((f"{directory}/{path.name}", "html", path.read_bytes()))
+    for path in sorted((FIXTURES_DIR / "documents").iterdir()):
+        kind = {".pdf": "pdf", ".docx": "docx"}.get(path.suffix)
+        if kind:
+            corpus.append((f"documents/{path.name}", kind, path.read_bytes()))
+    return corpus
+
+
+def legacy_chunk_page(soup: BeautifulSoup) -> list[str]:
+    """The four layout strategies chunk_page used before the Chunker, kept here as the baseline."""
+    chunks = []
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', role='main') or soup.body
+    if not main_content:
+        return []
+    page_title_el = main_content.find('h1')
+    page_title = page_title_el.get_text(strip=True) if page_title_el else ""
+
+    for selector in ['div.quote', 'div.card', 'div.product-card', 'div.item',
+                     'article.post', 'article.blog-post', 'li.list-item']:
+        items = main_content.select(selector)
+        if len(items) > 2:
+            for item in items:
+                text = item.get_text(separator="\n", strip=True)
+                if text and len(text.split()) > 5:
+                    chunks.append(f"Page Title: {page_title}\n\n{text}")
+            return chunks
+
+    sections = main_content.find_all('section', recursive=False)
+    if len(sections) > 1:
+        for section in sections:
+            heading = section.find(['h2', 'h3'])
+            text = section.get_text(separator="\n", strip=True)
+            if heading and len(text.split()) > 20:
+                chunks.append(f"Page Title: {page_title}\nSection: {heading.get_text(strip=True)}\n\n{text}")
+        if chunks:
+            return chunks
+
+    divs_with_id = main_content.find_all('div', id=True, recursive=False)
+    if len(divs_with_id) > 1:
+        for div in divs_with_id:
+            text = div.get_text(separator="\n", strip=True)
+            if len(text.split()) > 30:
+                chunks.append(f"Page Title: {page_title}\nSection ID: #{div['id']}\n\n{text}")
+        if chunks:
+            return chunks
+
+    full_text = main_content.get_text(separator="\n", strip=True)
+    if full_text and len(full_text.split()) > 30:
+        for sub_chunk in full_text.split('\n\n'):
+            if len(sub_chunk.split()) > 20:
+                chunks.append(f"Page Title: {page_title}\n\n{sub_chunk.strip()}")
+    return chunks
+
+
+def legacy_chunks(kind: str, content: bytes) -> list[str]:
+    if kind == "html":
+        return legacy_chunk_page(BeautifulSoup(content, "lxml"))
+    if kind == "pdf":
+        text = "\n".join(page.get_text() for page in fitz.open(stream=content, filetype="pdf"))
+    else:
+        text = "\n".join(paragraph.text for paragraph in docx.Document(io.BytesIO(content)).paragraphs if paragraph.text)
+    return [text.strip()] if text.strip() else []
+
+
+def budgeted_chunks(kind: str, content: bytes) -> list[str]:
+    if kind == "html":
+        return chunk_page(BeautifulSoup(content, "lxml"))
+    if kind == "pdf":
+        title, blocks = pdf_blocks(fitz.open(stream=content, filetype="pdf"))
+    else:
+        title, blocks = docx_blocks(docx.Document(io.BytesIO(content)))
+    return get_chunker().chunk(blocks, title)
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def sample_queries(corpus, count: int, rng: random.Random) -> list[tuple[str, str]]:
+    """(query, sentence) pairs: a sentence from the corpus with words dropped and shuffled."""
+    sentences = []
+    for _, kind, content in corpus:
+        for block in budgeted_blocks_text(kind, content):
+            sentences.extend(s for s in SENTENCE_END_RE.split(normalize(block)) if len(s.split()) >= 8)
+    # Chunk overlap repeats sentences
+    sentences = list(dict.fromkeys(sentences))
+    queries = []
+    for sentence in rng.sample(sentences, min(count, len(sentences))):
+        words = sentence.rstrip(".!?").split()
+        kept = rng.sample(words, max(3, math.ceil(len(words) * 2 / 3)))
+        queries.append((" ".join(kept), sentence))
+    return queries
+
+
+def budgeted_blocks_text(kind: str, content: bytes) -> list[str]:
+    chunks = budgeted_chunks(kind, content)
+    # Drop the title/section prefix; only body text makes a good query
+    return [chunk.split("\n\n", 1)[-1] for chunk in chunks]
+
+
+def truncate(text: str, count_tokens, window: int) -> str:
+    """What the embedding model reads of a chunk: its first `window` tokens."""
+    words = text.split()
+    kept, tokens = [], 0
+    for word in words:
+        tokens += count_tokens(word)
+        if tokens > window:
+            break
+        kept.append(word)
+    return " ".join(kept)
+
+
+class TfidfRetriever:
+    def __init__(self, documents: list[str]):
+        tokenized = [WORD_RE.findall(doc.lower()) for doc in documents]
+        self.vocabulary = {word: i for i, word in enumerate(sorted({w for words in tokenized for w in words}))}
+        counts = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, words in enumerate(tokenized):
+            for word in words:
+                counts[row, self.vocabulary[word]] += 1
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        self.matrix = self._normalize(counts * self.idf)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+    def rank(self, query: str) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for word in WORD_RE.findall(query.lower()):
+            if word in self.vocabulary:
+                vector[self.vocabulary[word]] += 1
+        scores = self.matrix @ self._normalize(vector * self.idf)
+        return np.argsort(-scores)
+
+
+class ModelRetriever:
+    def __init__(self, documents: list[str]):
+        from app.services.embedding import get_embeddings
+        self.get_embeddings = get_embeddings
+        self.matrix = np.array(get_embeddings(documents), dtype=np.float32)
+
+    def rank(self, query: str) -> np.ndarray:
+        vector = np.array(self.get_embeddings([query])[0], dtype=np.float32)
+        return np.argsort(np.linalg.norm(self.matrix - vector, axis=1))
+
+
+def evaluate(label: str, chunks: list[str], queries, retriever_class, top_k: int, count_tokens):
+    sizes = np.array([count_tokens(chunk) for chunk in chunks])
+    over_window = sizes > MODEL_WINDOW_TOKENS
+    lost = np.clip(sizes - MODEL_WINDOW_TOKENS, 0, None).sum() / sizes.sum()
+    print(f"{label:<15}: {len(chunks)} chunks, tokens median {np.median(sizes):.0f} / "
+          f"p95 {np.percentile(sizes, 95):.0f} / max {sizes.max()}, "
+          f"{over_window.mean():.0%} over the model window ({lost:.0%} of all text unseen)")
+
+    # Only text inside the model window counts: a hit on the rest of a chunk would be luck
+    visible = [truncate(chunk, count_tokens, MODEL_WINDOW_TOKENS) for chunk in chunks]
+    retriever = retriever_class(visible)
+    hits_at_1 = hits_at_k = reciprocal_rank = 0.0
+    for query, sentence in queries:
+        ranking = retriever.rank(query)
+        for position, index in enumerate(ranking[:top_k]):
+            if sentence in visible[index]:
+                hits_at_1 += position == 0
+                hits_at_k += 1
+                reciprocal_rank += 1 / (position + 1)
+                break
+    n = len(queries)
+    print(f"{'':<15}  recall@1 {hits_at_1 / n:.3f}, recall@{top_k} {hits_at_k / n:.3f}, "
+          f"MRR@{top_k} {reciprocal_rank / n:.3f}")
+
+
+def measure(chunk_fn, corpus, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, kind, content in corpus:
+            chunk_fn(kind, content)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--retriever", choices=("tfidf", "model"), default="tfidf")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    count_tokens = get_token_counter()
+    retriever_class = TfidfRetriever if args.retriever == "tfidf" else ModelRetriever
+    megabytes = sum(len(content) for _, _, content in corpus) / 2 ** 20
+    print(f"{len(corpus)} fixture documents ({megabytes:.2f} MiB), {args.retriever} retrieval\n")
+
+    with contextlib.redirect_stdout(io.StringIO()):  # PDF/DOCX handling logs every document
+        queries = sample_queries(corpus, args.queries, random.Random(args.seed))
+    for label, chunk_fn in (("legacy", legacy_chunks), ("token-budgeted", budgeted_chunks)):
+        chunks = [chunk for _, kind, content in corpus for chunk in chunk_fn(kind, content)]
+        evaluate(label, chunks, queries, retriever_class, args.top_k, count_tokens)
+        elapsed = measure(chunk_fn, corpus, args.rounds)
+        print(f"{'':<15}  chunking: {len(corpus) * args.rounds / elapsed:.0f} documents/s, "
+              f"{megabytes * args.rounds / elapsed:.2f} MiB/s\n")
+
+
+if __name__ == "__main__":
+    main()
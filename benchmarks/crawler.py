@@ -0,0 +1,62 @@
+"""
+Benchmarks the crawl engine against a local static test site.
+
+The fixture site in benchmarks/fixtures/site is served on localhost with an
+optional per-request latency. It is crawled once with a single worker (the
+old sequential behaviour) and once with N concurrent pages. Only links are
+extracted, so the numbers reflect fetching and rendering, not embedding.
+
+Requires Playwright's Chromium (`playwright install chromium`).
+
+Usage (from the repository root):
+    python -m benchmarks.crawler --concurrency 8 --latency 0.2
+"""
+import argparse
+import asyncio
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from app.services.crawler import Crawler, FetchedDocument
+from benchmarks.fixture_server import FIXTURES_DIR, serve_fixtures
+
+
+async def extract_links(document: FetchedDocument) -> list[str]:
+    if document.html is None:
+        return []
+    soup = BeautifulSoup(document.html, "lxml")
+    return [urljoin(document.url, a["href"]) for a in soup.find_all("a", href=True)]
+
+
+async def crawl(start_url: str, concurrency: int, max_pages: int, delay: float):
+    crawler = Crawler(
+        start_url=start_url,
+        handle_document=extract_links,
+        max_pages=max_pages,
+        concurrency=concurrency,
+        politeness_delay=delay,
+    )
+    return await crawler.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-pages", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated server latency per request (s)")
+    parser.add_argument("--politeness-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with serve_fixtures(FIXTURES_DIR / "site", latency=args.latency) as base_url:
+        start_url = f"{base_url}/index.html"
+        for concurrency in (1, args.concurrency):
+            stats = asyncio.run(crawl(start_url, concurrency, args.max_pages, args.politeness_delay))
+            print(
+                f"concurrency={concurrency:<3} pages={stats.pages_visited:<4} failed={stats.pages_failed:<3} "
+                f"time={stats.elapsed_seconds:6.2f}s  ({stats.pages_visited / stats.elapsed_seconds:6.2f} pages/s)  "
+                f"downloaded={stats.bytes_downloaded / 1024:.0f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
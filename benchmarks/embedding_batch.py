@@ -0,0 +1,70 @@
+"""
+Compares the per-chunk embedding path with the batched ChunkIngestor path.
+
+Both paths encode the same fixed, seeded corpus so the numbers are comparable
+between runs. Only the model is exercised, no database is needed.
+
+Usage (from the repository root):
+    python -m benchmarks.embedding_batch --chunks 2000 --batch-size 64
+"""
+import argparse
+import random
+import time
+
+from app.services.embedding import get_embedding_model, get_embeddings
+
+WORDS = (
+    "opening hours pricing delivery shipping returns refund warranty account "
+    "order product service support contact team store location office booking "
+    "reservation menu catalogue discount offer subscription plan payment invoice "
+    "customer quality guarantee appointment schedule weekend holiday available"
+).split()
+
+
+def build_corpus(n_chunks: int, seed: int = 42) -> list[str]:
+    """Builds a deterministic corpus of chunk-sized paragraphs."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n_chunks):
+        length = rng.randint(30, 180)
+        corpus.append(" ".join(rng.choice(WORDS) for _ in range(length)))
+    return corpus
+
+
+def run_per_chunk(corpus: list[str]) -> float:
+    """The old path: one encode() call per chunk."""
+    start = time.perf_counter()
+    for text in corpus:
+        get_embedding_model().encode(text.strip()).tolist()
+    return time.perf_counter() - start
+
+
+def run_batched(corpus: list[str], batch_size: int) -> float:
+    """The new path: bounded batches, one encode() call per batch."""
+    start = time.perf_counter()
+    for i in range(0, len(corpus), batch_size):
+        get_embeddings(corpus[i:i + batch_size], batch_size=batch_size)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.chunks)
+    # Warm up the model so the first measured call doesn't pay initialisation costs
+    get_embeddings(corpus[:8])
+
+    per_chunk = run_per_chunk(corpus)
+    batched = run_batched(corpus, args.batch_size)
+
+    print(f"Corpus: {len(corpus)} chunks")
+    print(f"Per-chunk encode : {per_chunk:8.2f}s  ({len(corpus) / per_chunk:8.1f} chunks/s)")
+    print(f"Batched encode   : {batched:8.2f}s  ({len(corpus) / batched:8.1f} chunks/s)")
+    print(f"Speed-up         : {per_chunk / batched:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Serves a fixtures directory over HTTP on localhost for the crawler benchmarks.
+
+Each response can be delayed to simulate network latency, which is where
+concurrent crawling pays off on real sites.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class DelayedRequestHandler(SimpleHTTPRequestHandler):
+    latency = 0.0
+
+    def send_head(self):
+        if self.latency:
+            time.sleep(self.latency)
+        return super().send_head()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_fixtures(directory: Path, latency: float = 0.0):
+    """Starts a threaded HTTP server for `directory` and yields its base URL."""
+    handler = type("Handler", (DelayedRequestHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=str(directory)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
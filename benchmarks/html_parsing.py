@@ -0,0 +1,71 @@
+"""
+Parsing benchmark: three BeautifulSoup parses per page vs one shared parse.
+
+Runs over the saved HTML fixtures in benchmarks/fixtures/html and
+benchmarks/fixtures/site. The old path parses each page three times: once for
+chunking, once for image alt texts and once for link discovery. The new path
+uses analyze_html, which derives all three from a single tree.
+
+Usage (from the repository root):
+    python -m benchmarks.html_parsing --rounds 20
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from bs4 import BeautifulSoup
+
+from app.services.page_analysis import analyze_html, chunk_page, extract_image_chunks, extract_links
+from benchmarks.fixture_server import FIXTURES_DIR
+
+
+def load_corpus() -> list[tuple[str, str]]:
+    paths = sorted((FIXTURES_DIR / "html").glob("*.html")) + sorted((FIXTURES_DIR / "site").glob("*.html"))
+    return [(f"https://example.com/{path.name}", path.read_text(encoding="utf-8")) for path in paths]
+
+
+def three_parses(url: str, html: str):
+    chunks = chunk_page(BeautifulSoup(html, "lxml"))
+    images = extract_image_chunks(BeautifulSoup(html, "lxml"), url)
+    links = extract_links(BeautifulSoup(html, "lxml"), url)
+    return chunks, images, links
+
+
+def single_parse(url: str, html: str):
+    analysis = analyze_html(html, url)
+    return analysis.chunks, analysis.image_chunks, analysis.links
+
+
+def measure(fn, corpus, rounds: int) -> float:
+    start = time.perf_counter()
+    # Keep any log output from chunking out of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            for url, html in corpus:
+                fn(url, html)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Both paths must produce identical results
+        for url, html in corpus:
+            assert three_parses(url, html) == single_parse(url, html), url
+
+    pages = len(corpus) * args.rounds
+    old = measure(three_parses, corpus, args.rounds)
+    new = measure(single_parse, corpus, args.rounds)
+    print(f"{len(corpus)} fixture pages x {args.rounds} rounds")
+    print(f"Three parses per page : {old:6.2f}s  ({pages / old:8.1f} pages/s)")
+    print(f"Single shared parse   : {new:6.2f}s  ({pages / new:8.1f} pages/s)")
+    print(f"Speed-up              : {old / new:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Latency of loading the images of a chat turn for the multimodal prompt.
+
+Product-photo-sized images (random noise, so they don't compress away) are
+generated into a temporary directory and served over localhost with a
+simulated network latency. Every turn loads the same top-k images in one of
+four ways:
+
+  * legacy:      the old path, one blocking requests.get() after another plus
+                 a full-resolution PIL decode, on every turn;
+  * cold cache:  ImageCache with an empty disk store: concurrent downloads
+                 over one keep-alive session, downscaled and stored;
+  * disk cache:  a new ImageCache over the filled store, as in a worker the
+                 scraper prefetched for;
+  * memory:      repeated turns on the same ImageCache.
+
+Usage (from the repository root):
+    python -m benchmarks.image_context --images 5 --turns 20 --latency 0.1
+"""
+import argparse
+import asyncio
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+from PIL import Image
+
+from app.services.image_cache import ImageCache
+from benchmarks.fixture_server import serve_fixtures
+
+
+def write_images(directory: Path, count: int, width: int, height: int) -> list[str]:
+    rng = np.random.default_rng(0)
+    names = []
+    for index in range(count):
+        pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        name = f"product-{index}.jpg"
+        Image.fromarray(pixels).save(directory / name, format="JPEG", quality=90)
+        names.append(name)
+    return names
+
+
+def legacy_turn(urls: list[str]) -> list[Image.Image]:
+    images = []
+    for url in urls:
+        response = requests.get(url, stream=True, timeout=10)
+        response.raise_for_status()
+        image = Image.open(io.BytesIO(response.content))
+        image.load()
+        images.append(image)
+    return images
+
+
+def make_cache(directory: Path, args) -> ImageCache:
+    return ImageCache(directory, max_dimension=args.max_dimension, image_format=args.format, quality=80,
+                      memory_max_images=256, fetch_timeout=10.0, fetch_max_bytes=50 * 1024 * 1024,
+                      fetch_workers=8, failure_ttl=300.0, max_age=3600.0)
+
+
+async def cached_turn(cache: ImageCache, urls: list[str]) -> list[Image.Image]:
+    images = await cache.load_many(urls)
+    return [image for image in images.values() if image is not None]
+
+
+def report(label: str, seconds: list[float], images: list[Image.Image]):
+    milliseconds = np.array(seconds) * 1000
+    size = images[0].size if images else (0, 0)
+    print(f"{label:<11}: median {np.median(milliseconds):8.1f} ms/turn, max {milliseconds.max():8.1f} ms "
+          f"({len(images)} images of {size[0]}x{size[1]})")
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as served, tempfile.TemporaryDirectory() as store:
+        names = write_images(Path(served), args.images, args.width, args.height)
+        megabytes = sum((Path(served) / name).stat().st_size for name in names) / 2 ** 20
+        print(f"{args.images} images per turn, {megabytes:.1f} MiB in total, {args.latency * 1000:.0f} ms latency\n")
+
+        with serve_fixtures(Path(served), latency=args.latency) as base_url:
+            urls = [f"{base_url}/{name}" for name in names]
+
+            seconds = []
+            for _ in range(args.turns):
+                start = time.perf_counter()
+                images = await asyncio.to_thread(legacy_turn, urls)
+                seconds.append(time.perf_counter() - start)
+            report("legacy", seconds, images)
+
+            cache = make_cache(Path(store), args)
+            start = time.perf_counter()
+            images = await cached_turn(cache, urls)
+            report("cold cache", [time.perf_counter() - start], images)
+
+            seconds = []
+            for _ in range(args.turns):
+                start = time.perf_counter()
+                images = await cached_turn(cache, urls)
+                seconds.append(time.perf_counter() - start)
+            cache.close()
+
+            disk_seconds = []
+            for _ in range(args.turns):
+                disk_cache = make_cache(Path(store), args)
+                start = time.perf_counter()
+                disk_images = await cached_turn(disk_cache, urls)
+                disk_seconds.append(time.perf_counter() - start)
+                disk_cache.close()
+            report("disk cache", disk_seconds, disk_images)
+            report("memory", seconds, images)
+
+        stored = sum(path.stat().st_size for path in (Path(store) / "blobs").rglob("*.*")) / 2 ** 20
+        print(f"\nStored {args.format} images: {stored:.2f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=5, help="image chunks in the top-k of a turn")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per image request")
+    parser.add_argument("--width", type=int, default=2400)
+    parser.add_argument("--height", type=int, default=1600)
+    parser.add_argument("--max-dimension", type=int, default=768)
+    parser.add_argument("--format", choices=("WEBP", "JPEG"), default="WEBP")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Checks robots.txt/sitemap discovery against the fixture site, then measures
+streamed sitemap parsing on a large generated sitemap.
+
+  * discovery: benchmarks/fixtures/discovery is served on localhost. It has a
+               robots.txt with a Disallow rule and a crawl-delay, a sitemap
+               index, a plain and a gzipped sitemap, and an orphan page that
+               no other page links to;
+  * parsing:   a gzipped sitemap with --urls entries is read with the
+               streaming parser and with a whole-document parse, comparing
+               time and peak Python memory.
+
+Usage (from the repository root):
+    python -m benchmarks.sitemap_parsing --urls 50000
+"""
+import argparse
+import gzip
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import requests
+
+from app.services.crawler import USER_AGENT
+from app.services.frontier import CrawlFrontier
+from app.services.site_discovery import RobotsRules, iter_sitemap_entries
+from benchmarks.fixture_server import FIXTURES_DIR, serve_fixtures
+
+
+def check_discovery():
+    with serve_fixtures(FIXTURES_DIR / "discovery") as base_url, requests.Session() as session:
+        robots = RobotsRules.fetch(session, base_url)
+        print(f"crawl-delay: {robots.crawl_delay(USER_AGENT)}s")
+        print(f"sitemaps:    {robots.sitemaps()}")
+
+        frontier = CrawlFrontier(
+            allowed_host=base_url.split("://", 1)[1],
+            strategy="sitemap_first",
+            url_filter=lambda url: robots.can_fetch(USER_AGENT, url),
+        )
+        for entry in iter_sitemap_entries(session, robots.sitemaps(), max_urls=1000):
+            admitted = frontier.push(entry.url, depth=0, priority=entry.priority,
+                                     from_sitemap=True, lastmod=entry.lastmod)
+            print(f"  {'queued ' if admitted else 'skipped'} {entry.url} "
+                  f"priority={entry.priority} lastmod={entry.lastmod}")
+
+        print("crawl order:")
+        while (entry := frontier.pop()) is not None:
+            print(f"  {entry.url}")
+
+
+def write_sitemap(path: Path, urls: int):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for i in range(urls):
+            f.write(f"<url><loc>https://example.com/page-{i}.html</loc>"
+                    f"<lastmod>2024-01-01</lastmod><priority>0.5</priority></url>\n")
+        f.write("</urlset>\n")
+
+
+def measure(label: str, parse):
+    start = time.perf_counter()
+    count = parse()
+    elapsed = time.perf_counter() - start
+
+    # Timed and traced separately, since tracemalloc slows down allocation-heavy code
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10}: {count} URLs in {elapsed:6.2f}s, peak {peak / 1024 / 1024:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=50000)
+    args = parser.parse_args()
+
+    check_discovery()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_sitemap(Path(directory) / "sitemap.xml.gz", args.urls)
+        with serve_fixtures(Path(directory)) as base_url, requests.Session() as session:
+            sitemap_url = f"{base_url}/sitemap.xml.gz"
+
+            def streamed():
+                return sum(1 for _ in iter_sitemap_entries(session, [sitemap_url], max_urls=args.urls))
+
+            def whole_document():
+                root = ET.fromstring(gzip.decompress(session.get(sitemap_url).content))
+                return len(root)
+
+            print(f"\n{args.urls} URL sitemap (gzipped)")
+            measure("streamed", streamed)
+            measure("whole doc", whole_document)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Import time and memory of the API server's (or the scraper worker's) module graph.
+
+Each round imports the module in a fresh interpreter started with
+`python -X importtime`, the same cost every uvicorn worker and every
+--reload restart pays before it can serve. The benchmark reports:
+- The wall time of the import.
+- The peak RSS right after the import.
+- The packages with the largest cumulative import time.
+
+The API server must not import the scraping and model stack: torch,
+sentence-transformers, Playwright, PyMuPDF, python-docx and the Gemini SDK
+are loaded on first use (model warm-up, the first chat), not at import time.
+With --check, the benchmark exits with an error when any of them is
+imported, so a regression can fail a CI job.
+
+Needs the app's settings in the environment (or .env), as the server does.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --module app.main --rounds 5 --check
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+# Top-level packages that only the scraper or a loaded model should need
+HEAVY_PACKAGES = ("torch", "sentence_transformers", "transformers", "playwright", "fitz", "docx", "google.generativeai")
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(f"RESULT {{elapsed}} {{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}", file=sys.stdout)
+"""
+
+
+def run_probe(module: str) -> tuple[float, float, dict[str, int]]:
+    """(import seconds, peak RSS in MiB, cumulative import microseconds per package) of one fresh interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    # A package's cost is the cumulative time of its outermost (least indented) import
+    cumulative: dict[str, int] = {}
+    depths: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        package, depth = match.group(4).split(".")[0], len(match.group(3))
+        if depth < depths.get(package, sys.maxsize):
+            depths[package] = depth
+            cumulative[package] = int(match.group(2))
+    elapsed, max_rss_kib = result.stdout.split("RESULT ", 1)[1].split()
+    return float(elapsed), int(max_rss_kib) / 1024, cumulative
+
+
+def imported_modules(module: str) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to list")
+    parser.add_argument("--check", action="store_true", help="fail if a heavy package is imported")
+    args = parser.parse_args()
+
+    runs = [run_probe(args.module) for _ in range(args.rounds)]
+    elapsed = [run[0] for run in runs]
+    rss = [run[1] for run in runs]
+    print(f"import {args.module}: median {statistics.median(elapsed) * 1000:.0f} ms "
+          f"(min {min(elapsed) * 1000:.0f}, max {max(elapsed) * 1000:.0f}) over {args.rounds} fresh interpreters, "
+          f"peak RSS {statistics.median(rss):.0f} MiB\n")
+
+    # The last run has warm OS caches, like a --reload restart
+    cumulative = runs[-1][2]
+    own_package = args.module.split(".")[0]
+    slowest = sorted((item for item in cumulative.items() if item[0] not in (own_package, "site", "encodings")),
+                     key=lambda item: -item[1])
+    print("Slowest packages imported along the way (cumulative, last run):")
+    for package, microseconds in slowest[:args.top]:
+        print(f"  {microseconds / 1000:8.1f} ms  {package}")
+
+    modules = imported_modules(args.module)
+    heavy = [package for package in HEAVY_PACKAGES if package in modules]
+    print(f"\nHeavy packages imported: {', '.join(heavy) if heavy else 'none'}")
+    if args.check and heavy:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services.crawler import Crawler
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """Answers /<status> with that status and a small HTML body."""
+
+    def do_GET(self):
+        status = int(self.path.strip("/"))
+        body = b"<html><body>page</body></html>"
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crawler(base_url):
+    async def handle_document(document):
+        return []
+
+    return Crawler(f"{base_url}/", handle_document, max_pages=10, concurrency=1, politeness_delay=0.0)
+
+
+def test_ok_page_is_downloaded(crawler, base_url):
+    download = crawler._download(f"{base_url}/200")
+
+    assert download.status == 200
+    assert download.kind == "html"
+    assert download.body == b"<html><body>page</body></html>"
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_gone_page_is_reported_without_body(crawler, base_url, status):
+    download = crawler._download(f"{base_url}/{status}")
+
+    assert download.status == status
+    assert download.kind is None
+
+
+@pytest.mark.parametrize("status", [403, 429, 500, 503])
+def test_error_status_raises(crawler, base_url, status):
+    with pytest.raises(requests.HTTPError):
+        crawler._download(f"{base_url}/{status}")
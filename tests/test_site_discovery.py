@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from app.services.crawler import USER_AGENT, Crawler
+from app.services.site_discovery import DEFAULT_SITEMAP_PRIORITY, RobotsRules, iter_sitemap_entries
+from benchmarks.fixture_server import FIXTURES_DIR, serve_fixtures
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    with serve_fixtures(FIXTURES_DIR / "discovery") as url:
+        yield url
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as s:
+        yield s
+
+
+def make_crawler(base_url: str, **kwargs) -> Crawler:
+    async def handle_document(*args):
+        raise AssertionError("discovery must not fetch pages")
+
+    options = {"max_pages": 10, "concurrency": 1, "politeness_delay": 0.0, "frontier_strategy": "sitemap_first"}
+    return Crawler(f"{base_url}/", handle_document, **{**options, **kwargs})
+
+
+def test_robots_rules(base_url, session):
+    robots = RobotsRules.fetch(session, base_url)
+
+    assert robots.can_fetch(USER_AGENT, f"{base_url}/about.html")
+    assert not robots.can_fetch(USER_AGENT, f"{base_url}/private/secret.html")
+    assert robots.crawl_delay(USER_AGENT) == 1.0
+    assert robots.sitemaps() == [f"{base_url}/sitemap_index.xml"]
+
+
+def test_missing_robots_allows_everything(session, tmp_path):
+    with serve_fixtures(tmp_path) as url:
+        robots = RobotsRules.fetch(session, url)
+
+    assert robots.can_fetch(USER_AGENT, f"{url}/private/secret.html")
+    assert robots.crawl_delay(USER_AGENT) is None
+    assert robots.sitemaps() == [f"{url}/sitemap.xml"]
+
+
+def test_sitemap_index_is_followed(base_url, session):
+    entries = list(iter_sitemap_entries(session, [f"{base_url}/sitemap_index.xml"], max_urls=100))
+
+    # Children of the index are read in order: the plain sitemap, then the gzipped one
+    assert [entry.url for entry in entries] == [
+        f"{base_url}/index.html",
+        f"{base_url}/about.html",
+        f"{base_url}/orphan.html",
+        f"{base_url}/private/secret.html",
+        f"{base_url}/docs/getting-started.html",
+    ]
+    by_url = {entry.url.removeprefix(base_url): entry for entry in entries}
+    assert by_url["/index.html"].priority == 1.0
+    assert by_url["/index.html"].lastmod == datetime(2024, 4, 1, tzinfo=timezone.utc)
+    assert by_url["/about.html"].lastmod == datetime(2024, 3, 15, 9, 30, tzinfo=timezone.utc)
+    assert by_url["/orphan.html"].lastmod == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    assert by_url["/private/secret.html"].lastmod is None
+    assert by_url["/private/secret.html"].priority == DEFAULT_SITEMAP_PRIORITY
+    assert by_url["/docs/getting-started.html"].lastmod == datetime(2024, 2, 10, tzinfo=timezone.utc)
+
+
+def test_sitemap_nesting_and_url_limits(base_url, session):
+    index = [f"{base_url}/sitemap_index.xml"]
+
+    assert list(iter_sitemap_entries(session, index, max_urls=100, max_nesting=0)) == []
+    assert len(list(iter_sitemap_entries(session, index, max_urls=2))) == 2
+
+
+def test_gzipped_sitemap(base_url, session):
+    entries = list(iter_sitemap_entries(session, [f"{base_url}/sitemap-docs.xml.gz"], max_urls=100))
+
+    assert [entry.url for entry in entries] == [f"{base_url}/docs/getting-started.html"]
+
+
+def test_discovery_seeds_frontier(base_url):
+    crawler = make_crawler(base_url)
+    crawler._discover()
+
+    order = []
+    while (entry := crawler.frontier.pop()) is not None:
+        order.append(entry.url.removeprefix(base_url))
+    # Disallowed by robots.txt, so never queued; the rest by priority, then most recent lastmod
+    assert order == ["/index.html", "/orphan.html", "/about.html", "/docs/getting-started.html"]
+    assert f"{base_url}/private/secret.html" not in crawler.frontier.seen
+
+
+def test_discovery_ignores_robots_when_disabled(base_url):
+    crawler = make_crawler(base_url, respect_robots=False)
+    crawler._discover()
+
+    assert f"{base_url}/private/secret.html" in crawler.frontier.seen
+
+
+@pytest.mark.parametrize("politeness_delay, max_crawl_delay, expected", [
+    (0.0, 10.0, 1.0),  # robots.txt asks for more than the configured delay
+    (2.0, 10.0, 2.0),  # the configured delay is never shortened
+    (0.0, 0.5, 0.5),  # capped at max_crawl_delay
+])
+def test_crawl_delay_is_capped(base_url, politeness_delay, max_crawl_delay, expected):
+    crawler = make_crawler(base_url, politeness_delay=politeness_delay, max_crawl_delay=max_crawl_delay)
+    crawler._discover()
+
+    host = base_url.split("://", 1)[1]
+    assert crawler.rate_limiter._intervals[host] == expected